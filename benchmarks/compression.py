@@ -0,0 +1,81 @@
+"""Бенчмарк сжатия ответов: index и profile.
+
+Страница рендерится один раз, затем CompressionMiddleware прогоняется
+над её копией для каждого варианта: без сжатия, только сжатие
+пробелов, gzip и br (если установлен brotli). Печатаются размер тела
+и время обработки. Запуск из корня репозитория:
+
+    python benchmarks/compression.py --posts 500 --repeat 50
+"""
+import argparse
+import statistics
+import time
+
+from templates import seed  # noqa: E402 (настраивает Django)
+
+from django.db import connection  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import resolve, reverse  # noqa: E402
+
+from core import middleware  # noqa: E402
+
+VARIANTS = {
+    'identity': ('identity', False),
+    'minify': ('identity', True),
+    'gzip': ('gzip', True),
+    'br': ('br', True),
+}
+
+
+def render(url, user):
+    request = RequestFactory().get(url)
+    request.user = user
+    match = resolve(request.path_info)
+    return match.func(request, *match.args, **match.kwargs).content
+
+
+def measure(content, accept, minify, repeat):
+    factory = RequestFactory()
+    compressor = middleware.CompressionMiddleware(lambda r: None)
+    timings = []
+    with override_settings(HTML_MINIFY=minify):
+        for _ in range(repeat):
+            request = factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+            response = HttpResponse(content)
+            started = time.perf_counter()
+            response = compressor.process_response(request, response)
+            timings.append((time.perf_counter() - started) * 1000)
+    return len(response.content), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0)
+    reader, author, _ = seed(args.posts)
+    pages = {
+        'index': reverse('posts:index'),
+        'profile': reverse('posts:profile', args=[author.username]),
+    }
+    variants = {
+        name: value for name, value in VARIANTS.items()
+        if name != 'br' or middleware.brotli is not None
+    }
+    print(f'{"страница":<10}{"вариант":<10}{"байт":>10}{"p50, мс":>10}')
+    with override_settings(DEBUG=False, CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+    }}):
+        for page, url in pages.items():
+            content = render(url, reader)
+            for name, (accept, minify) in variants.items():
+                size, p50 = measure(content, accept, minify, args.repeat)
+                print(f'{page:<10}{name:<10}{size:>10}{p50:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Бенчмарк задержек всех маршрутов posts, users и about.
+
+База наполняется по очереди до каждого размера из --sizes (посты
+добавляются к уже созданным), и на каждом размере все маршруты
+запрашиваются тестовым клиентом от имени авторизованного читателя.
+Для маршрута считаются запросы в секунду и перцентили задержки.
+Результат пишется в JSON; с --baseline он сравнивается с прошлым
+запуском, и маршруты, у которых p50 вырос больше чем на --threshold,
+печатаются как регрессии (код возврата 1). Запуск из корня
+репозитория:
+
+    python benchmarks/routes.py --sizes 10000 100000 --repeat 50 \\
+        --baseline benchmarks/results/main.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+from templates import seed  # noqa: E402 (настраивает Django)
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import URLPattern, get_resolver  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from posts.importer import restore_dates  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+NAMESPACES = ('posts', 'users', 'about')
+# Маршруты с побочными эффектами: выход разлогинит клиента, подписки
+# и выгрузка меняют данные или принимают только POST.
+SKIP = {
+    'users:logout', 'users:export_start',
+    'posts:profile_follow', 'posts:profile_unfollow',
+}
+# Посты пишутся пачками, а их даты разнесены на шаг, чтобы ленты,
+# архив и «Популярное» видели посты разного возраста.
+BATCH_SIZE = 1000
+POST_STEP = timedelta(minutes=1)
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'results')
+
+
+def routes(values):
+    """Пары (имя маршрута, путь) с аргументами из values."""
+    resolver = get_resolver()
+    found = []
+    for namespace in NAMESPACES:
+        prefix, namespace_resolver = resolver.namespace_dict[namespace]
+        for pattern in namespace_resolver.url_patterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = f'{namespace}:{pattern.name}'
+            if name in SKIP:
+                continue
+            path = '/' + prefix + str(pattern.pattern)
+            for key, value in values.items():
+                path = path.replace(f'<{key}>', str(value))
+                for converter in ('int', 'str', 'slug'):
+                    path = path.replace(f'<{converter}:{key}>', str(value))
+            found.append((name, path))
+    return found
+
+
+def grow(total, authors, group):
+    """Досоздать посты до total; каждый следующий старше предыдущего."""
+    now = timezone.now()
+    for start in range(Post.objects.count(), total, BATCH_SIZE):
+        stop = min(start + BATCH_SIZE, total)
+        Post.objects.bulk_create(
+            Post(text=f'Текст поста {i}\nвторая строка',
+                 author=authors[i % len(authors)], group=group)
+            for i in range(start, stop)
+        )
+        # bulk_create ставит всем auto_now и на SQLite не возвращает id:
+        # даты задаются после вставки по последним id.
+        ids = Post.objects.order_by('-pk').values_list('pk', flat=True)
+        restore_dates(Post, [
+            (pk, now - POST_STEP * i)
+            for i, pk in zip(range(start, stop), reversed(ids[:stop - start]))
+        ])
+
+
+def measure(client, path, repeat):
+    client.get(path)
+    timings = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        request_started = time.perf_counter()
+        response = client.get(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        timings.append((time.perf_counter() - request_started) * 1000)
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        'status': response.status_code,
+        'rps': repeat / elapsed,
+        'mean': statistics.mean(timings),
+        'p50': timings[len(timings) // 2],
+        'p95': timings[max(int(len(timings) * 0.95) - 1, 0)],
+        'p99': timings[max(int(len(timings) * 0.99) - 1, 0)],
+    }
+
+
+def compare(current, baseline, threshold):
+    """Регрессии: (размер, маршрут, был p50, стал p50)."""
+    regressions = []
+    for size, results in current.items():
+        for name, result in results.items():
+            before = baseline.get(size, {}).get(name)
+            if before and result['p50'] > before['p50'] * (1 + threshold):
+                regressions.append((size, name, before['p50'], result['p50']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output',
+                        default=os.path.join(RESULTS_DIR, 'latest.json'))
+    parser.add_argument('--baseline', help='JSON прошлого запуска')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='допустимый рост p50, доля')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='подменить кэш на DummyCache')
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0)
+    sizes = sorted(args.sizes)
+    # Посты досоздаёт grow, чтобы у всех были разные даты.
+    reader, author, group = seed(0)
+    authors = [author, *type(author).objects.filter(
+        username__startswith='author').exclude(pk=author.pk)]
+    grow(sizes[0], authors, group)
+    post = Post.objects.filter(author=author).first()
+    values = {'slug': group.slug, 'username': author.username,
+              'post_id': post.pk}
+    overrides = {'DEBUG': False, 'ALLOWED_HOSTS': ['testserver']}
+    if args.no_cache:
+        overrides['CACHES'] = {'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+        }}
+
+    results = {}
+    with override_settings(**overrides):
+        client = Client()
+        client.force_login(reader)
+        for size in sizes:
+            grow(size, authors, group)
+            print(f'\n{size} постов')
+            print(f'{"маршрут":<28}{"код":>5}{"req/s":>9}'
+                  f'{"p50":>9}{"p95":>9}{"p99":>9}')
+            results[str(size)] = {}
+            for name, path in routes(values):
+                result = measure(client, path, args.repeat)
+                result['path'] = path
+                results[str(size)][name] = result
+                print(f'{name:<28}{result["status"]:>5}{result["rps"]:>9.1f}'
+                      f'{result["p50"]:>9.2f}{result["p95"]:>9.2f}'
+                      f'{result["p99"]:>9.2f}')
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump({'repeat': args.repeat, 'results': results}, file,
+                  ensure_ascii=False, indent=2)
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)['results']
+    regressions = compare(results, baseline, args.threshold)
+    for size, name, before, after in regressions:
+        print(f'РЕГРЕССИЯ {size} {name}: p50 {before:.2f} -> {after:.2f} мс')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
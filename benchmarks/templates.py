@@ -0,0 +1,98 @@
+"""Бенчмарк рендеринга лент: index, group_list, profile и follow.
+
+Кэш подменяется на DummyCache, поэтому каждая итерация рендерит
+страницу целиком; DEBUG выключен, как в продакшене (кэширующий
+загрузчик шаблонов, без журнала SQL). Запуск из корня репозитория:
+
+    python benchmarks/templates.py --posts 2000 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import resolve, reverse  # noqa: E402
+
+from posts.models import Follow, Group, Post  # noqa: E402
+
+User = get_user_model()
+
+
+def seed(posts):
+    reader = User.objects.create_user(username='reader')
+    User.objects.bulk_create(
+        User(username=f'author{i}', first_name='Автор', last_name=str(i))
+        for i in range(10)
+    )
+    authors = list(User.objects.filter(username__startswith='author'))
+    group = Group.objects.create(title='Группа', slug='bench',
+                                 description='Группа для бенчмарка')
+    Post.objects.bulk_create(
+        (Post(text=f'Текст поста {i}\nвторая строка',
+              author=authors[i % len(authors)], group=group)
+         for i in range(posts)),
+        batch_size=500
+    )
+    Follow.objects.bulk_create(
+        Follow(user=reader, author=author) for author in authors
+    )
+    return reader, authors[0], group
+
+
+def measure(url, user, repeat):
+    factory = RequestFactory()
+    timings = []
+    for _ in range(repeat):
+        request = factory.get(url)
+        request.user = user
+        match = resolve(request.path_info)
+        started = time.perf_counter()
+        match.func(request, *match.args, **match.kwargs)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return (statistics.mean(timings), timings[len(timings) // 2],
+            timings[int(len(timings) * 0.95) - 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--page', type=int, default=50,
+                        help='номер страницы: длинная пагинация')
+    args = parser.parse_args()
+
+    connection.creation.create_test_db(verbosity=0)
+    reader, author, group = seed(args.posts)
+    pages = {
+        'index': reverse('posts:index'),
+        'group_list': reverse('posts:group_list', args=[group.slug]),
+        'profile': reverse('posts:profile', args=[author.username]),
+        'follow': reverse('posts:follow_index'),
+    }
+    print(f'{"страница":<12}{"mean, мс":>10}{"p50, мс":>10}{"p95, мс":>10}')
+    with override_settings(DEBUG=False, CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+    }}):
+        for name, url in pages.items():
+            mean, p50, p95 = measure(
+                f'{url}?page={args.page}', reader, args.repeat
+            )
+            print(f'{name:<12}{mean:>10.2f}{p50:>10.2f}{p95:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,21 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(request, django_db_blocker,
+                                 django_db_modify_db_settings_parallel_suffix):
+    """Тестовая база из снимка core.testdb, своя копия на воркер xdist."""
+    from core import testdb
+
+    worker = getattr(request.config, 'workerinput', {}).get('workerid', '')
+    # Без снимка он собирается миграциями, а им нужен доступ к БД.
+    with django_db_blocker.unblock():
+        request.config.snapshot_db = testdb.use_snapshots(worker=worker)
+
+
+@pytest.fixture(scope='session')
+def django_db_keepdb(request, django_db_modify_db_settings):
+    return (getattr(request.config, 'snapshot_db', False)
+            or request.config.getvalue('reuse_db'))
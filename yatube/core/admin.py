@@ -0,0 +1,41 @@
+from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .jobs import run_job
+from .models import BackgroundJob
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'processed', 'total',
+                    'created', 'finished')
+    list_filter = ('status',)
+    readonly_fields = ('name', 'owner', 'status', 'processed', 'total',
+                       'error', 'created', 'finished')
+
+    def has_add_permission(self, request):
+        return False
+
+
+class BackgroundDeleteMixin:
+    """Админка без стандартного «Удалить выбранные».
+
+    Оно идёт через Collector по строке с сигналами и надолго блокирует
+    SQLite; такие модели удаляются фоновыми действиями модерации.
+    """
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+
+def run_admin_job(modeladmin, request, name, func, *args, total=0):
+    """Запустить фоновое задание из действия админки и сообщить о нём."""
+    job = run_job(name, func, *args, total=total)
+    url = reverse('admin:core_backgroundjob_change', args=[job.pk])
+    modeladmin.message_user(request, format_html(
+        'Запущено задание <a href="{}">#{}</a>: {}', url, job.pk, name
+    ))
+    return job
@@ -0,0 +1,19 @@
+from functools import partial
+
+from django.utils.functional import SimpleLazyObject
+
+from posts.notifications import unread_count
+
+
+def unread_notifications(request):
+    """Добавляет число непрочитанных уведомлений.
+
+    Значение считается лениво и один раз за рендер: запрос уходит,
+    только если шаблон выводит переменную.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'unread_notifications': SimpleLazyObject(partial(unread_count, user)),
+    }
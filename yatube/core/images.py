@@ -0,0 +1,69 @@
+"""Варианты картинок постов для тега responsive_image.
+
+Миниатюры в WebP и JPEG для srcset и размытый плейсхолдер строятся
+при загрузке картинки (prepare во view поста) и командой warm_caches,
+а не при рендере страницы: рендер только читает готовые варианты из
+кэша и без них выводит оригинал. Картинки не растягиваются:
+маленький оригинал даёт в srcset только свои настоящие ширины.
+"""
+import base64
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Пропорции обложки поста: 960x339.
+RATIO = 339 / 960
+FORMATS = (('image/webp', 'WEBP'), ('image/jpeg', 'JPEG'))
+VARIANTS_KEY = 'image_variants:{}'
+
+
+def geometry(width):
+    return f'{width}x{round(width * RATIO)}'
+
+
+def _thumbnail(name, width, **options):
+    # Импорт здесь: sorl тянет PIL при импорте.
+    from sorl.thumbnail import get_thumbnail
+
+    return get_thumbnail(name, geometry(width), crop='center',
+                         upscale=False, **options)
+
+
+def build(name):
+    """Сгенерировать миниатюры и плейсхолдер и положить их в кэш."""
+    sources = []
+    for mime, fmt in FORMATS:
+        widths = {}
+        for width in settings.POST_IMAGE_WIDTHS:
+            thumb = _thumbnail(name, width, format=fmt)
+            widths.setdefault(thumb.width, thumb.url)
+        sources.append((mime, ', '.join(
+            f'{url} {width}w' for width, url in sorted(widths.items())
+        )))
+    fallback = _thumbnail(name, settings.POST_IMAGE_DEFAULT_WIDTH)
+    blurred = _thumbnail(name, 24, blur=2, quality=40, format='JPEG')
+    data = base64.b64encode(blurred.read()).decode()
+    variants = {
+        'sources': sources,
+        'fallback': {'url': fallback.url, 'width': fallback.width,
+                     'height': fallback.height},
+        'placeholder': f'data:image/jpeg;base64,{data}',
+    }
+    cache.set(VARIANTS_KEY.format(name), variants, None)
+    return variants
+
+
+def prepare(name):
+    """Собрать варианты загруженной картинки; ошибка только логируется."""
+    try:
+        build(name)
+    except Exception:
+        logger.exception('Не удалось сделать миниатюры %s', name)
+
+
+def variants(name):
+    """Готовые варианты картинки или None, если сборки ещё не было."""
+    return cache.get(VARIANTS_KEY.format(name))
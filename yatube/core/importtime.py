@@ -0,0 +1,64 @@
+"""Замер стоимости импортов при запуске.
+
+Команда manage.py (или загрузка yatube.wsgi) запускается в отдельном
+процессе с python -X importtime, а вывод интерпретатора разбирается
+в строки (модуль, собственное время, время с вложенными импортами).
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter, namedtuple
+
+from django.conf import settings
+
+LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+Import = namedtuple('Import', 'name self cumulative depth')
+
+
+def parse(text):
+    """Строки -X importtime в список Import (микросекунды)."""
+    imports = []
+    for line in text.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            imports.append(
+                Import(name, int(own), int(cumulative), len(indent) // 2)
+            )
+    return imports
+
+
+def by_package(imports):
+    """Собственное время импортов по пакетам верхнего уровня."""
+    totals = Counter()
+    for item in imports:
+        totals[item.name.split('.')[0]] += item.self
+    return totals
+
+
+def command(args, wsgi=False):
+    if wsgi:
+        return [sys.executable, '-X', 'importtime', '-c', 'import yatube.wsgi']
+    return [sys.executable, '-X', 'importtime',
+            os.path.join(settings.BASE_DIR, 'manage.py'), *args]
+
+
+def run(args, wsgi=False, repeat=1):
+    """Запустить команду repeat раз.
+
+    Возвращает импорты последнего запуска и лучшее время запуска, с.
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run(
+            command(args, wsgi), cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            universal_newlines=True
+        )
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return parse(result.stderr), best
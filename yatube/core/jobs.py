@@ -0,0 +1,75 @@
+"""Фоновые задания в пуле потоков процесса.
+
+Задание — функция, принимающая первым аргументом BackgroundJob и
+отмечающая прогресс через job.advance(). Состояние задания хранится
+в БД, поэтому его видно в админке. При BACKGROUND_JOBS_SYNC задания
+выполняются сразу в вызывающем потоке (тесты, management-команды).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_JOB_WORKERS,
+                thread_name_prefix='background-job'
+            )
+    return _executor
+
+
+def _execute(job, func, args, kwargs):
+    BackgroundJob.objects.filter(pk=job.pk).update(
+        status=BackgroundJob.RUNNING
+    )
+    try:
+        func(job, *args, **kwargs)
+    except Exception as error:
+        logger.exception('Фоновое задание #%s завершилось ошибкой', job.pk)
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            status=BackgroundJob.FAILED,
+            error=str(error),
+            finished=timezone.now()
+        )
+    else:
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            status=BackgroundJob.DONE,
+            finished=timezone.now()
+        )
+
+
+def _execute_in_thread(job, func, args, kwargs):
+    close_old_connections()
+    try:
+        _execute(job, func, args, kwargs)
+    finally:
+        connections.close_all()
+
+
+def run_job(name, func, *args, total=0, owner=None, **kwargs):
+    """Создать задание и запустить func(job, *args, **kwargs) в фоне.
+
+    owner — пользователь, для которого выполняется задание.
+    """
+    job = BackgroundJob.objects.create(name=name, total=total, owner=owner)
+    if settings.BACKGROUND_JOBS_SYNC:
+        _execute(job, func, args, kwargs)
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(
+            _execute_in_thread, job, func, args, kwargs
+        ))
+    return job
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+
+
+class CronCommand(BaseCommand):
+    """Служебная команда для планировщика и скриптов.
+
+    Проверки проекта выполняются на деплое, а не при каждом запуске.
+    """
+    requires_system_checks = False
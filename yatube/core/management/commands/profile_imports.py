@@ -0,0 +1,51 @@
+import shlex
+
+from core.importtime import by_package, run
+from core.management.base import CronCommand
+
+
+class Command(CronCommand):
+    help = ('Показать, какие модули дороже всего импортируются при '
+            'запуске команды manage.py или загрузке WSGI-приложения.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--command', default='check',
+            help='Команда manage.py с аргументами, например "decay_scores"'
+        )
+        parser.add_argument(
+            '--wsgi', action='store_true',
+            help='Замерить импорт yatube.wsgi, как при старте воркера'
+        )
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help='Сколько самых дорогих модулей показать'
+        )
+        parser.add_argument(
+            '--by-package', action='store_true',
+            help='Суммировать время по пакетам верхнего уровня'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Сколько раз запустить; время берётся лучшее'
+        )
+
+    def handle(self, *args, **options):
+        imports, elapsed = run(
+            shlex.split(options['command']), options['wsgi'],
+            options['repeat']
+        )
+        total = sum(item.self for item in imports)
+        target = 'yatube.wsgi' if options['wsgi'] else options['command']
+        self.stdout.write(
+            f'{target}: запуск {elapsed:.2f} с, модулей {len(imports)}, '
+            f'импорт {total / 1000:.0f} мс'
+        )
+        if options['by_package']:
+            rows = by_package(imports).most_common(options['top'])
+        else:
+            rows = [(item.name, item.cumulative) for item in sorted(
+                imports, key=lambda item: item.cumulative, reverse=True
+            ) if item.depth == 0][:options['top']]
+        for name, microseconds in rows:
+            self.stdout.write(f'{microseconds / 1000:>9.1f} мс  {name}')
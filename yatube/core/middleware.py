@@ -0,0 +1,128 @@
+"""Сжатие ответов и сжатие пробелов в HTML.
+
+CompressionMiddleware выбирает br или gzip по Accept-Encoding
+(с учётом q), не трогает ответы меньше COMPRESSION_MIN_SIZE, уже
+сжатые и несжимаемые типы, а потоковые ответы сжимает на лету.
+При HTML_MINIFY перед сжатием из HTML убираются лишние пробелы и
+переводы строк, которые оставляют шаблоны.
+"""
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # brotli не обязателен, остаётся только gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript',
+    'application/xml', 'image/svg+xml',
+)
+# Внутри этих тегов пробелы значимы.
+PRESERVE_RE = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL
+)
+SPACE_RE = re.compile(r'[ \t]*\n\s*')
+
+
+def minify_html(html):
+    """Схлопнуть пробелы с переводами строк до одного перевода строки."""
+    parts = PRESERVE_RE.split(html)
+    # split даёт [текст, блок, имя тега, текст, блок, имя тега, ...].
+    result = []
+    for index in range(0, len(parts), 3):
+        result.append(SPACE_RE.sub('\n', parts[index]))
+        if index + 1 < len(parts):
+            result.append(parts[index + 1])
+    return ''.join(result)
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с q > 0, по убыванию q."""
+    encodings = []
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        if name and quality > 0:
+            encodings.append((quality, name.strip().lower()))
+    return [name for _, name in sorted(encodings, key=lambda e: -e[0])]
+
+
+def choose_encoding(header, available=None):
+    """Кодировка из available, которую клиент предпочитает остальным."""
+    if available is None:
+        available = ('br', 'gzip') if brotli is not None else ('gzip',)
+    for name in accepted_encodings(header):
+        if name in available:
+            return name
+        if name == '*':
+            return available[0]
+    return None
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=5)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+        # Отдаём клиенту каждый кусок, не дожидаясь конца потока.
+        yield compressor.flush()
+    yield compressor.finish()
+
+
+COMPRESSORS = {
+    'gzip': (compress_string, compress_sequence),
+    'br': (lambda data: brotli.compress(data, quality=5), _brotli_sequence),
+}
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if (response.has_header('Content-Encoding')
+                or not content_type.startswith(COMPRESSIBLE_TYPES)):
+            return response
+        if (settings.HTML_MINIFY and not response.streaming
+                and content_type.startswith('text/html')):
+            response.content = minify_html(
+                response.content.decode(response.charset)
+            ).encode(response.charset)
+            response['Content-Length'] = str(len(response.content))
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        compress, compress_stream = COMPRESSORS[encoding]
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        # Сжатое тело не совпадает побайтно с несжатым.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -1,12 +1,65 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import F
 
 
 class CreatedModel(models.Model):
-    """Абстрактная модель. Добавляет дату создания."""
+    """Абстрактная модель. Добавляет даты создания и изменения."""
     created = models.DateTimeField(
         'Дата создания',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         abstract = True
+
+
+class BackgroundJob(CreatedModel):
+    """Фоновое задание и его прогресс."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задание', max_length=200)
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING
+    )
+    total = models.PositiveIntegerField('Всего', default=0)
+    processed = models.PositiveIntegerField('Обработано', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    finished = models.DateTimeField('Дата завершения', null=True, blank=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='background_jobs',
+        verbose_name='Владелец'
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Фоновое задание'
+        verbose_name_plural = 'Фоновые задания'
+
+    def __str__(self):
+        return self.name
+
+    def advance(self, count):
+        """Отметить обработку ещё count объектов."""
+        BackgroundJob.objects.filter(pk=self.pk).update(
+            processed=F('processed') + count
+        )
+        self.processed += count
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+ESTIMATE_QUERIES = {
+    'postgresql': 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+    'mysql': ('SELECT table_rows FROM information_schema.tables '
+              'WHERE table_schema = DATABASE() AND table_name = %s'),
+    # sqlite_stat1 заполняется командой ANALYZE; первое число — строки.
+    'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+}
+
+
+def estimate_count(model, using='default'):
+    """Оценка числа строк таблицы по статистике БД или None."""
+    connection = connections[using]
+    sql = ESTIMATE_QUERIES.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [model._meta.db_table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    return int(str(row[0]).split()[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор списков админки для больших таблиц.
+
+    Для списка без фильтров точный COUNT(*) заменяется оценкой из
+    статистики БД, если таблица больше ADMIN_ESTIMATED_COUNT_THRESHOLD.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if (estimate is not None
+                    and estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD):
+                return estimate
+        return super().count
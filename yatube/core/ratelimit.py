@@ -0,0 +1,52 @@
+import hashlib
+import math
+import time
+
+from django.core.cache import caches
+
+
+class TokenBucket:
+    """Ограничитель частоты «token bucket» в кэше ratelimit.
+
+    Кэш ratelimit общий для всех процессов (по умолчанию таблица в БД),
+    иначе каждый воркер считал бы свой лимит.
+
+    В ведре помещается capacity токенов, за period секунд оно
+    наполняется заново. Каждое действие забирает токен; пустое ведро
+    означает, что действие нужно отклонить. Чтение и запись не атомарны:
+    при гонке пропускается не больше пары лишних действий.
+    """
+
+    def __init__(self, name, capacity, period):
+        self.name = name
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.timeout = math.ceil(period)
+
+    def _key(self, key):
+        digest = hashlib.md5(str(key).encode()).hexdigest()
+        return f'ratelimit:{self.name}:{digest}'
+
+    def _level(self, cache_key, now):
+        level, stamp = caches['ratelimit'].get(
+            cache_key, (self.capacity, now)
+        )
+        return min(self.capacity, level + (now - stamp) * self.rate)
+
+    def available(self, key, tokens=1):
+        """Хватает ли токенов для ключа; токены не тратятся."""
+        return self._level(self._key(key), time.time()) >= tokens
+
+    def consume(self, key, tokens=1):
+        """Забрать токены для ключа; вернуть False, если их не хватает."""
+        cache_key = self._key(key)
+        now = time.time()
+        level = self._level(cache_key, now)
+        allowed = level >= tokens
+        if allowed:
+            level -= tokens
+        caches['ratelimit'].set(cache_key, (level, now), self.timeout)
+        return allowed
+
+    def reset(self, key):
+        caches['ratelimit'].delete(self._key(key))
@@ -0,0 +1,92 @@
+"""Раздача собранной статики из процесса приложения.
+
+Используется, когда перед приложением нет CDN или nginx
+(SERVE_STATIC). Список файлов STATIC_ROOT читается один раз при
+старте. Файлы с отпечатком из манифеста отдаются с
+«Cache-Control: immutable» на год, остальные — на STATIC_MAX_AGE
+секунд. Если клиент принимает br или gzip (с учётом q) и рядом лежит
+сжатая копия (core.storage), отдаётся она.
+"""
+import json
+import mimetypes
+import os
+from wsgiref.headers import Headers
+
+from .middleware import choose_encoding
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class StaticFiles:
+    def __init__(self, application, root, prefix, max_age=60):
+        self.application = application
+        self.prefix = prefix
+        self.max_age = max_age
+        self.files = self._scan(root)
+
+    def _scan(self, root):
+        hashed = set()
+        manifest = os.path.join(root, 'staticfiles.json')
+        if os.path.exists(manifest):
+            with open(manifest) as source:
+                hashed = set(json.load(source).get('paths', {}).values())
+        files = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(directory, name)
+                url = os.path.relpath(path, root).replace(os.sep, '/')
+                if url.endswith(('.gz', '.br')):
+                    continue
+                files[url] = {
+                    'path': path,
+                    'type': (mimetypes.guess_type(name)[0]
+                             or 'application/octet-stream'),
+                    'immutable': url in hashed,
+                    'variants': [
+                        (encoding, path + suffix)
+                        for encoding, suffix in ENCODINGS
+                        if os.path.exists(path + suffix)
+                    ],
+                }
+        return files
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if (environ.get('REQUEST_METHOD') in ('GET', 'HEAD')
+                and path.startswith(self.prefix)):
+            entry = self.files.get(path[len(self.prefix):])
+            if entry is not None:
+                return self.serve(entry, environ, start_response)
+        return self.application(environ, start_response)
+
+    def serve(self, entry, environ, start_response):
+        headers = Headers([('Content-Type', entry['type'])])
+        path = entry['path']
+        if entry['variants']:
+            headers['Vary'] = 'Accept-Encoding'
+            variants = dict(entry['variants'])
+            encoding = choose_encoding(
+                environ.get('HTTP_ACCEPT_ENCODING', ''), tuple(variants)
+            )
+            if encoding is not None:
+                path = variants[encoding]
+                headers['Content-Encoding'] = encoding
+        headers['Content-Length'] = str(os.path.getsize(path))
+        headers['Cache-Control'] = (
+            IMMUTABLE if entry['immutable']
+            else f'public, max-age={self.max_age}'
+        )
+        start_response('200 OK', headers.items())
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(path, 'rb')
+        wrapper = environ.get('wsgi.file_wrapper')
+        if wrapper is not None:
+            return wrapper(file)
+        return _chunks(file)
+
+
+def _chunks(file, size=64 * 1024):
+    with file:
+        yield from iter(lambda: file.read(size), b'')
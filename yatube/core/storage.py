@@ -0,0 +1,69 @@
+"""Хранилище статики с отпечатками в именах и сжатыми копиями.
+
+collectstatic кладёт рядом с каждым текстовым файлом с отпечатком .gz
+и .br (без brotli — только .gz). Сжатые копии отдаёт
+core.static.StaticFiles или фронтовой сервер (gzip_static/brotli_static
+в nginx).
+"""
+import gzip
+import io
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli не обязателен, остаётся только gzip
+    brotli = None
+
+COMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.ico', '.txt', '.json',
+                       '.map', '.html', '.xml')
+
+
+def _gzip(data):
+    buffer = io.BytesIO()
+    # mtime=0: одинаковый файл даёт одинаковый архив при каждой сборке.
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9,
+                       mtime=0) as archive:
+        archive.write(data)
+    return buffer.getvalue()
+
+
+def compressors():
+    """Доступные кодировки: (расширение, функция сжатия)."""
+    result = [('.gz', _gzip)]
+    if brotli is not None:
+        result.insert(0, ('.br', brotli.compress))
+    return result
+
+
+def compress_file(path):
+    """Записать сжатые копии файла, если они меньше оригинала."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    written = []
+    for extension, compress in compressors():
+        packed = compress(data)
+        if len(packed) >= len(data):
+            continue
+        with open(path + extension, 'wb') as target:
+            target.write(packed)
+        written.append(path + extension)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Сжимает только файлы с отпечатком, которые выдал post_process."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        # CSS проходит несколько раз; сжимается итоговое имя.
+        hashed = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed[name] = hashed_name
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(hashed.values()):
+            if name.endswith(COMPRESS_EXTENSIONS):
+                compress_file(self.path(name))
@@ -0,0 +1,50 @@
+from django import template
+from django.conf import settings
+
+from core import images
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_info.html', takes_context=True)
+def post_card(context, post, eager=False):
+    """Карточка поста в ленте.
+
+    В отличие от {% include %} шаблон карточки рендерится с контекстом
+    из одного поста, а не с копией всего контекста страницы. Отрисованная
+    карточка кэшируется по id поста, дате его изменения, имени автора
+    и готовности вариантов картинки (core.images), чтобы оригинал,
+    выведенный до сборки миниатюр, не застревал в кэше. Состояние
+    зрителя (posts.viewer) выводится вне кэша, если лента его посчитала.
+    Картинка первой карточки (eager) грузится сразу, остальных — лениво.
+    """
+    viewer = None
+    if hasattr(post, 'viewer_follows'):
+        viewer = context.get('user')
+    images_ready = bool(post.image) and (
+        images.variants(post.image.name) is not None
+    )
+    return {
+        'post': post,
+        'viewer': viewer,
+        'eager': eager,
+        'images_ready': images_ready,
+        'timeout': settings.POST_CARD_TIMEOUT,
+    }
+
+
+@register.simple_tag
+def page_window(page_obj, size=2):
+    """Номера страниц вокруг текущей, None на месте пропуска.
+
+    Для 100 страниц и текущей 50 вернёт [1, None, 48, ..., 52, None, 100].
+    """
+    last = page_obj.paginator.num_pages
+    start = max(page_obj.number - size, 1)
+    end = min(page_obj.number + size, last)
+    pages = list(range(start, end + 1))
+    if start > 1:
+        pages = [1] + [None] * (start > 2) + pages
+    if end < last:
+        pages = pages + [None] * (end < last - 1) + [last]
+    return pages
@@ -0,0 +1,24 @@
+from django import template
+from django.conf import settings
+
+from core import images
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/responsive_image.html')
+def responsive_image(image, eager=False):
+    """Картинка поста: <picture> с srcset в WebP и JPEG.
+
+    Браузер выбирает ширину по sizes. Картинки ниже первого экрана
+    (не eager) грузятся лениво, а до загрузки виден размытый
+    плейсхолдер. Миниатюры здесь не генерируются (core.images): пока
+    они не готовы, выводится оригинал.
+    """
+    if not image:
+        return {}
+    context = {'original': image.url, 'lazy': not eager}
+    found = images.variants(image.name)
+    if found is not None:
+        context.update(found, sizes=settings.POST_IMAGE_SIZES)
+    return context
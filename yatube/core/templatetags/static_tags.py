@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def _read_cached(path):
+    return _read(path)
+
+
+def _read(path):
+    absolute = finders.find(path)
+    if absolute is None:
+        raise template.TemplateSyntaxError(f'Нет статического файла {path}')
+    with open(absolute, encoding='utf-8') as source:
+        return source.read()
+
+
+@register.simple_tag
+def inline_static(path):
+    """Содержимое статического файла для вставки прямо в страницу.
+
+    Используется для критического CSS: стили первого экрана приходят
+    вместе с HTML, а bootstrap.min.css грузится без блокировки
+    отрисовки. Вне DEBUG файл читается один раз на процесс.
+    """
+    if settings.DEBUG:
+        return mark_safe(_read(path))
+    return mark_safe(_read_cached(path))
@@ -0,0 +1,12 @@
+from django.test.runner import DiscoverRunner
+
+from . import testdb
+
+
+class SnapshotTestRunner(DiscoverRunner):
+    """DiscoverRunner, берущий тестовые базы из снимков core.testdb."""
+
+    def setup_databases(self, **kwargs):
+        if testdb.use_snapshots(verbosity=self.verbosity):
+            self.keepdb = True
+        return super().setup_databases(**kwargs)
@@ -0,0 +1,103 @@
+"""Снимки тестовой базы SQLite.
+
+Мигрированная тестовая база собирается один раз и хранится в
+TEST_DB_SNAPSHOT_DIR под ключом из хэша файлов миграций всех
+приложений, версии Django и таблиц кэша в БД. Перед прогоном снимок
+копируется в файл тестовой базы процесса (VACUUM INTO, на старых
+SQLite — копией файла), а база открывается с keepdb, поэтому migrate
+ничего не применяет. Пока миграции не меняются, подготовка базы
+занимает доли секунды. Копии для --parallel Django делает сам
+копированием файла, воркеры pytest-xdist получают свои копии по worker.
+"""
+import glob
+import hashlib
+import os
+import shutil
+import sqlite3
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+
+
+def migration_hash():
+    """Ключ снимка: хэш миграций, версии Django и таблиц кэша в БД."""
+    digest = hashlib.sha1(django.get_version().encode())
+    for alias in sorted(settings.CACHES):
+        cache = settings.CACHES[alias]
+        if cache['BACKEND'].endswith('.DatabaseCache'):
+            digest.update(f'cache/{cache["LOCATION"]}'.encode())
+    for app in sorted(apps.get_app_configs(), key=lambda app: app.label):
+        directory = os.path.join(app.path, 'migrations')
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.py'):
+                continue
+            digest.update(f'{app.label}/{name}'.encode())
+            with open(os.path.join(directory, name), 'rb') as file:
+                digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def clone(source, target):
+    """Скопировать базу source в target."""
+    if os.path.exists(target):
+        os.remove(target)
+    if sqlite3.sqlite_version_info < (3, 27):
+        shutil.copyfile(source, target)
+        return
+    db = sqlite3.connect(source)
+    try:
+        db.execute('VACUUM INTO ?', (target,))
+    finally:
+        db.close()
+
+
+def _build(alias, path, verbosity):
+    """Создать мигрированную базу и сохранить её снимком в path."""
+    creation = connections[alias].creation
+    partial = f'{path}.{os.getpid()}.part'
+    connections[alias].settings_dict['TEST']['NAME'] = partial
+    old_name = creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    creation.destroy_test_db(old_name, verbosity, keepdb=True)
+    # Несколько воркеров могли собирать снимок одновременно.
+    os.replace(partial, path)
+
+
+def use_snapshots(worker='', verbosity=0):
+    """Подставить копии снимков как тестовые базы SQLite.
+
+    Возвращает True, если хотя бы одна база взята из снимка; тогда
+    тестовые базы нужно открывать с keepdb.
+    """
+    if not settings.TEST_DB_SNAPSHOTS:
+        return False
+    directory = settings.TEST_DB_SNAPSHOT_DIR
+    os.makedirs(directory, exist_ok=True)
+    key = migration_hash()
+    used = False
+    for alias in connections:
+        if connections[alias].vendor != 'sqlite':
+            continue
+        snapshot = os.path.join(directory, f'{alias}_{key}.sqlite3')
+        if not os.path.exists(snapshot):
+            # Только готовые снимки: .part собирают параллельные прогоны.
+            for stale in glob.glob(os.path.join(directory,
+                                                f'{alias}_*.sqlite3')):
+                os.remove(stale)
+            _build(alias, snapshot, verbosity)
+        suffix = f'_{worker}' if worker else ''
+        target = os.path.join(directory, f'test_{alias}{suffix}.sqlite3')
+        if not worker:
+            # Копии прошлого прогона с --parallel могли устареть.
+            for old in glob.glob(os.path.join(directory,
+                                              f'test_{alias}_[0-9]*')):
+                os.remove(old)
+        clone(snapshot, target)
+        connections[alias].settings_dict['TEST']['NAME'] = target
+        used = True
+    return used
@@ -1,6 +1,35 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
-from django.test import TestCase
+import brotli
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import (
+    call_command, get_commands, load_command_class
+)
+from django.core.paginator import Paginator
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+
+from posts.models import Post
+
+from . import images, importtime, testdb
+from .management.base import CronCommand
+from .middleware import CompressionMiddleware, choose_encoding, minify_html
+from .models import BackgroundJob
+from .static import StaticFiles
+from .test_runner import SnapshotTestRunner
+from .templatetags.feed_tags import page_window
 
 
 class ViewTestClass(TestCase):
@@ -11,3 +40,378 @@ class ViewTestClass(TestCase):
     def test_error_page_uses_right_template(self):
         response = self.client.get('/nonexist-page/')
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class PageWindowTests(TestCase):
+    def test_page_window(self):
+        """Пагинатор показывает только соседние страницы"""
+        pag = Paginator(range(1000), 10)
+        cases = {
+            1: [1, 2, 3, None, 100],
+            4: [1, 2, 3, 4, 5, 6, None, 100],
+            50: [1, None, 48, 49, 50, 51, 52, None, 100],
+            100: [1, None, 98, 99, 100],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(page_window(pag.page(number)), expected)
+        self.assertEqual(page_window(Paginator(range(5), 10).page(1)), [1])
+
+
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        with override_settings(
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE='core.storage.'
+                                'CompressedManifestStaticFilesStorage'
+        ):
+            call_command('collectstatic', interactive=False,
+                         stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def call(self, path, **environ):
+        app = StaticFiles(lambda environ, start: [b'app'], self.root,
+                          '/static/')
+        result = {}
+
+        def start_response(status, headers):
+            result['status'] = status
+            result['headers'] = dict(headers)
+
+        environ.setdefault('REQUEST_METHOD', 'GET')
+        body = b''.join(app(dict(environ, PATH_INFO=path), start_response))
+        return result, body
+
+    def hashed_css(self):
+        folder = os.path.join(self.root, 'css')
+        return next(name for name in os.listdir(folder)
+                    if name.startswith('bootstrap.min.')
+                    and name.endswith('.css')
+                    and name != 'bootstrap.min.css')
+
+    def test_precompressed_copies(self):
+        """collectstatic пишет gzip- и brotli-копии файлов с отпечатком"""
+        path = os.path.join(self.root, 'css', self.hashed_css())
+        with open(path, 'rb') as original:
+            data = original.read()
+        with open(path + '.gz', 'rb') as gz, open(path + '.br', 'rb') as br:
+            self.assertEqual(gzip.decompress(gz.read()), data)
+            self.assertEqual(brotli.decompress(br.read()), data)
+        for name in ('css/bootstrap.min.css', 'staticfiles.json'):
+            with self.subTest(name=name):
+                self.assertFalse(
+                    os.path.exists(os.path.join(self.root, name + '.gz'))
+                )
+
+    def test_negotiates_encoding(self):
+        """Обёртка выбирает копию по q и не отдаёт отклонённую кодировку"""
+        path = f'/static/css/{self.hashed_css()}'
+        cases = {
+            'br, gzip': 'br',
+            'gzip, br;q=0.5': 'gzip',
+            'gzip;q=0': None,
+            'gzip;q=0, br;q=0': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                result, _ = self.call(path, HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(
+                    result['headers'].get('Content-Encoding'), expected
+                )
+        result, body = self.call(path, HTTP_ACCEPT_ENCODING='br')
+        self.assertIn(b'bootstrap', brotli.decompress(body))
+
+    def test_serves_compressed_immutable(self):
+        """Обёртка отдаёт сжатый файл с отпечатком на год"""
+        result, body = self.call(f'/static/css/{self.hashed_css()}',
+                                 HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(result['headers']['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', result['headers']['Cache-Control'])
+        self.assertIn(b'bootstrap', gzip.decompress(body))
+
+    def test_plain_and_fallthrough(self):
+        """Без отпечатка кэш короткий, чужие пути уходят в приложение"""
+        result, _ = self.call('/static/css/bootstrap.min.css')
+        self.assertNotIn('Content-Encoding', result['headers'])
+        self.assertNotIn('immutable', result['headers']['Cache-Control'])
+        self.assertEqual(self.call('/about/')[1], b'app')
+
+    def test_critical_css_inlined(self):
+        """Критический CSS встроен в страницу"""
+        response = self.client.get('/')
+        self.assertContains(response, '<style>')
+        self.assertContains(response, 'rel="preload"')
+
+
+class ResponsiveImageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        self.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=get_user_model().objects.create_user(username='Author'),
+            image=SimpleUploadedFile('small.gif', small_gif, 'image/gif')
+        )
+        images.build(self.post.image.name)
+
+    def render(self, eager):
+        return Template(
+            '{% load image_tags %}{% responsive_image image eager=eager %}'
+        ).render(Context({'image': self.post.image, 'eager': eager}))
+
+    def test_srcset_and_placeholder(self):
+        """Картинка выводится с srcset в WebP и JPEG и плейсхолдером"""
+        html = self.render(eager=False)
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('type="image/jpeg"', html)
+        # Картинка 2x1 не растягивается до ширин из POST_IMAGE_WIDTHS.
+        self.assertEqual(html.count(' 2w'), 2)
+        self.assertNotIn(' 480w', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('decoding="async"', html)
+        self.assertIn('data:image/jpeg;base64,', html)
+
+    def test_eager(self):
+        """Картинка первого экрана грузится сразу"""
+        self.assertNotIn('loading="lazy"', self.render(eager=True))
+
+    def test_original_until_built(self):
+        """Пока миниатюры не собраны, выводится оригинал, задач нет"""
+        cache.clear()
+        with mock.patch('core.images.build') as build:
+            html = self.render(eager=False)
+        build.assert_not_called()
+        self.assertFalse(BackgroundJob.objects.exists())
+        self.assertIn(f'src="{self.post.image.url}"', html)
+        self.assertNotIn('<picture>', html)
+
+    def test_card_cache_follows_variants(self):
+        """Карточка с оригиналом не остаётся в кэше после сборки"""
+        template = Template('{% load feed_tags %}{% post_card post %}')
+        cache.clear()
+        self.assertNotIn('<picture>',
+                         template.render(Context({'post': self.post})))
+        images.build(self.post.image.name)
+        self.assertIn('<picture>',
+                      template.render(Context({'post': self.post})))
+
+
+class CompressionMiddlewareTests(TestCase):
+    BODY = '<p>\n    {}\n</p>\n'.format('Текст ' * 200)
+
+    def process(self, response, accept='gzip'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda r: response).process_response(
+            request, response
+        )
+
+    def test_gzip(self):
+        """Большой HTML сжимается gzip, Vary и Content-Length выставлены"""
+        response = self.process(HttpResponse(self.BODY))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        self.assertIn('Текст', gzip.decompress(response.content).decode())
+
+    def test_skipped(self):
+        """Маленькие, несжимаемые и уже сжатые ответы не трогаются"""
+        cases = {
+            'small': HttpResponse('<p>мало</p>'),
+            'image': HttpResponse(b'x' * 5000, content_type='image/png'),
+            'encoded': HttpResponse(self.BODY),
+        }
+        cases['encoded']['Content-Encoding'] = 'identity'
+        for name, response in cases.items():
+            with self.subTest(name=name):
+                response = self.process(response)
+                self.assertNotEqual(response.get('Content-Encoding'), 'gzip')
+        self.assertFalse(
+            self.process(HttpResponse(self.BODY), accept='gzip;q=0')
+            .has_header('Content-Encoding')
+        )
+
+    def test_negotiation(self):
+        """Кодировка выбирается по q, неизвестные пропускаются"""
+        self.assertEqual(choose_encoding('deflate, gzip;q=0.5'), 'gzip')
+        self.assertEqual(choose_encoding('gzip;q=0.5, br'), 'br')
+        self.assertEqual(choose_encoding('br;q=0, gzip'), 'gzip')
+        self.assertEqual(choose_encoding('*'), 'br')
+        self.assertEqual(choose_encoding('*', ('gzip',)), 'gzip')
+        self.assertIsNone(choose_encoding('br', ('gzip',)))
+        self.assertIsNone(choose_encoding('deflate'))
+        self.assertIsNone(choose_encoding(''))
+
+    def test_brotli(self):
+        """Обычный и потоковый ответы сжимаются brotli"""
+        response = self.process(HttpResponse(self.BODY), accept='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        self.assertIn('Текст', brotli.decompress(response.content).decode())
+        response = self.process(StreamingHttpResponse(
+            self.BODY.encode() for _ in range(3)
+        ), accept='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            brotli.decompress(b''.join(response.streaming_content)).decode(),
+            self.BODY * 3
+        )
+
+    def test_streaming(self):
+        """Потоковый ответ сжимается на лету"""
+        response = self.process(StreamingHttpResponse(
+            self.BODY.encode() for _ in range(3)
+        ))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)).decode(),
+            self.BODY * 3
+        )
+
+    def test_minify(self):
+        """Пробелы с переводами строк схлопываются, кроме pre и textarea"""
+        html = '<div>\n    <p>a  b</p>\n\n  </div><pre>\n  x\n</pre>'
+        self.assertEqual(minify_html(html),
+                         '<div>\n<p>a  b</p>\n</div><pre>\n  x\n</pre>')
+
+    def test_index_compressed(self):
+        """Главная страница отдаётся сжатой"""
+        response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('<html', gzip.decompress(response.content).decode())
+
+
+class TestDbSnapshotTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_migration_hash(self):
+        """Ключ снимка меняется вместе с миграциями и версией Django"""
+        migrations = os.path.join(self.directory, 'migrations')
+        os.makedirs(migrations)
+        app = mock.Mock(label='app', path=self.directory)
+        migration = os.path.join(migrations, '0001_initial.py')
+        with mock.patch.object(testdb.apps, 'get_app_configs',
+                               return_value=[app]):
+            with open(migration, 'w') as file:
+                file.write('operations = []\n')
+            key = testdb.migration_hash()
+            self.assertEqual(testdb.migration_hash(), key)
+            with open(migration, 'w') as file:
+                file.write('operations = [1]\n')
+            changed = testdb.migration_hash()
+            self.assertNotEqual(changed, key)
+            with mock.patch('django.get_version', return_value='0.0'):
+                self.assertNotEqual(testdb.migration_hash(), changed)
+
+    def test_use_snapshots(self):
+        """Старые снимки удаляются, недособранные чужие — нет"""
+        key = testdb.migration_hash()
+        names = ('default_old.sqlite3', 'default_old.sqlite3.7.part',
+                 f'default_{key}.sqlite3.8.part')
+        for name in names:
+            open(os.path.join(self.directory, name), 'w').close()
+
+        def build(alias, path, verbosity):
+            open(path, 'w').close()
+
+        test_settings = connection.settings_dict['TEST']
+        self.addCleanup(test_settings.__setitem__, 'NAME',
+                        test_settings['NAME'])
+        with override_settings(TEST_DB_SNAPSHOT_DIR=self.directory), \
+                mock.patch.object(testdb, '_build', side_effect=build), \
+                mock.patch.object(testdb, 'clone') as clone:
+            self.assertTrue(testdb.use_snapshots(worker='2'))
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            sorted([f'default_{key}.sqlite3', *names[1:]])
+        )
+        target = os.path.join(self.directory, 'test_default_2.sqlite3')
+        clone.assert_called_once_with(
+            os.path.join(self.directory, f'default_{key}.sqlite3'), target
+        )
+        self.assertEqual(test_settings['NAME'], target)
+
+    @override_settings(TEST_DB_SNAPSHOTS=False)
+    def test_snapshots_disabled(self):
+        """Без TEST_DB_SNAPSHOTS базы создаются как обычно"""
+        self.assertFalse(testdb.use_snapshots())
+        runner = SnapshotTestRunner(verbosity=0)
+        with mock.patch('django.test.runner.DiscoverRunner.setup_databases'):
+            runner.setup_databases()
+        self.assertFalse(runner.keepdb)
+
+    def test_runner_keeps_snapshot_db(self):
+        """Раннер открывает базу из снимка с keepdb"""
+        runner = SnapshotTestRunner(verbosity=0)
+        with mock.patch.object(testdb, 'use_snapshots', return_value=True), \
+                mock.patch('django.test.runner.DiscoverRunner'
+                           '.setup_databases') as setup:
+            runner.setup_databases()
+        self.assertTrue(runner.keepdb)
+        setup.assert_called_once_with()
+
+    def test_clone(self):
+        """Копия снимка содержит данные исходной базы"""
+        source = os.path.join(self.directory, 'source.sqlite3')
+        target = os.path.join(self.directory, 'target.sqlite3')
+        db = sqlite3.connect(source)
+        db.execute('CREATE TABLE t (x INTEGER)')
+        db.execute('INSERT INTO t VALUES (42)')
+        db.commit()
+        db.close()
+        for _ in range(2):
+            testdb.clone(source, target)
+        db = sqlite3.connect(target)
+        self.assertEqual(db.execute('SELECT x FROM t').fetchall(), [(42,)])
+        db.close()
+
+
+class ImportTimeTests(TestCase):
+    def test_parse(self):
+        """Вывод -X importtime разбирается с вложенностью и пакетами"""
+        imports = importtime.parse(
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       100 |        100 |   django.utils\n'
+            'import time:        50 |        150 | django\n'
+            'import time:        30 |         30 | posts.models\n'
+        )
+        self.assertEqual(imports[0],
+                         importtime.Import('django.utils', 100, 100, 1))
+        self.assertEqual(imports[1].depth, 0)
+        self.assertEqual(importtime.by_package(imports),
+                         {'django': 150, 'posts': 30})
+
+    def test_cron_commands_skip_checks(self):
+        """Команды по расписанию запускаются без системных проверок"""
+        commands = get_commands()
+        for name in ('archive_posts', 'clean_exports', 'decay_scores',
+                     'media_gc', 'profile_imports', 'purge_hidden',
+                     'refresh_group_stats', 'send_notification_digests',
+                     'warm_caches'):
+            with self.subTest(name=name):
+                command = load_command_class(commands[name], name)
+                self.assertIsInstance(command, CronCommand)
+                self.assertFalse(command.requires_system_checks)
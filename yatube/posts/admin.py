@@ -1,15 +1,123 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
 
-from .models import Comment, Follow, Group, Post
+from core.admin import BackgroundDeleteMixin, run_admin_job
+from core.paginator import EstimatedCountPaginator
+
+from . import moderation
+from .models import ArchivedPost, Comment, Follow, Group, Post
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Список без точных COUNT(*) по всей таблице."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class ModeratedAdmin(BackgroundDeleteMixin, ScalableAdmin):
+    """Список вместе со скрытыми объектами и действия в фоне."""
+
+    def get_queryset(self, request):
+        queryset = self.model.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+    def run_in_background(self, request, queryset, name, func, *args):
+        run_admin_job(self, request, name, func, queryset, *args,
+                      total=queryset.count())
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа'
+    )
+
+
+class RowAutocompleteSelect(AutocompleteSelect):
+    """Автокомплит для list_editable.
+
+    Подпись выбранного значения берётся из объекта строки, уже
+    загруженного через list_select_related, а не запросом на строку.
+    """
+    row_choice = None
+
+    def optgroups(self, name, value, attr=None):
+        row = self.row_choice
+        if row is None or {str(v) for v in value} != {str(row.pk)}:
+            return super().optgroups(name, value, attr)
+        default = (None, [], 0)
+        if not self.is_required:
+            default[1].append(self.create_option(name, '', '', False, 0))
+        label = self.choices.field.label_from_instance(row)
+        default[1].append(self.create_option(
+            name, row.pk, label, True, len(default[1])
+        ))
+        return [default]
+
+
+class PostChangeListForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        widget = self.fields['group'].widget
+        getattr(widget, 'widget', widget).row_choice = self.instance.group
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'created', 'author', 'group')
+class PostAdmin(ModeratedAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'group', 'is_hidden')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('created',)
+    list_filter = ('created', 'is_hidden')
+    date_hierarchy = 'created'
     empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = ('delete_in_background', 'hide_in_background',
+               'regroup_in_background')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'group':
+            kwargs['widget'] = RowAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using')
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', PostChangeListForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def delete_in_background(self, request, queryset):
+        self.run_in_background(request, queryset, 'Удаление постов',
+                               moderation.delete_posts)
+    delete_in_background.short_description = 'Удалить в фоне'
+
+    def hide_in_background(self, request, queryset):
+        self.run_in_background(request, queryset, 'Скрытие постов',
+                               moderation.hide_posts)
+    hide_in_background.short_description = 'Скрыть в фоне'
+
+    def regroup_in_background(self, request, queryset):
+        field = self.action_form.base_fields['group']
+        try:
+            group = field.clean(request.POST.get('group'))
+        except ValidationError:
+            group = None
+        if group is None:
+            self.message_user(request, 'Выберите группу для переноса',
+                              messages.ERROR)
+            return
+        self.run_in_background(
+            request, queryset, f'Перенос постов в группу «{group}»',
+            moderation.regroup_posts, group.pk
+        )
+    regroup_in_background.short_description = 'Перенести в группу в фоне'
 
 
 @admin.register(Group)
@@ -19,11 +127,43 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'author', 'post')
+class CommentAdmin(ModeratedAdmin):
+    list_display = ('pk', 'text', 'author', 'post', 'is_hidden')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
     search_fields = ('text',)
+    list_filter = ('is_hidden',)
+    date_hierarchy = 'created'
+    actions = ('delete_in_background', 'hide_in_background')
+
+    def delete_in_background(self, request, queryset):
+        self.run_in_background(request, queryset, 'Удаление комментариев',
+                               moderation.delete_comments)
+    delete_in_background.short_description = 'Удалить в фоне'
+
+    def hide_in_background(self, request, queryset):
+        self.run_in_background(request, queryset, 'Скрытие комментариев',
+                               moderation.hide_comments)
+    hide_in_background.short_description = 'Скрыть в фоне'
 
 
 @admin.register(Follow)
-class Follow(admin.ModelAdmin):
+class FollowAdmin(ScalableAdmin):
     list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+
+
+@admin.register(ArchivedPost)
+class ArchivedPostAdmin(ScalableAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'group')
+    list_select_related = ('author', 'group')
+    search_fields = ('text',)
+    date_hierarchy = 'created'
+    empty_value_display = '-пусто-'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,200 @@
+"""Архив старых постов.
+
+Посты старше POSTS_ARCHIVE_AFTER_DAYS переносятся командой archive_posts
+в таблицы ArchivedPost и ArchivedComment с теми же id; ревизии и
+уведомления переводятся на архивный пост. Ленты собираются из двух
+уровней: сначала горячая таблица, за ней архив. Архив запрашивается
+только для страниц за границей горячей части, а число архивных постов
+кэшируется до следующего переноса или удаления архивного поста (для
+ленты подписок — ещё и до изменения подписок).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from . import feeds, moderation
+from .models import (ArchivedComment, ArchivedPost, Comment, Notification,
+                     Post, PostRevision)
+
+VERSION_KEY = 'archive:version'
+COUNT_KEY = 'archive:count:{}:{}'
+
+
+def version():
+    """Версия архива, меняется при переносе и удалении постов."""
+    return cache.get_or_set(VERSION_KEY, 0, None)
+
+
+def bump_version():
+    cache.set(VERSION_KEY, int(time.time() * 1000), None)
+
+
+def archived_count(queryset, key):
+    """Число архивных постов; с ключом результат кэшируется."""
+    if key is None:
+        return queryset.count()
+    return cache.get_or_set(
+        COUNT_KEY.format(key, version()), queryset.count, None
+    )
+
+
+class _Slice:
+    """Ленивый срез на границе уровней: запросы только при чтении."""
+
+    def __init__(self, hot, cold):
+        self.hot = hot
+        self.cold = cold
+
+    @cached_property
+    def items(self):
+        return list(self.hot) + list(self.cold)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+
+class TieredFeed:
+    """Лента из горячих и архивных постов как одна последовательность.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator.
+    """
+
+    def __init__(self, hot, cold, key=None, hot_count=None):
+        self.hot = hot
+        self.cold = cold
+        self.key = key
+        if hot_count is not None:
+            self.hot_count = hot_count
+
+    @cached_property
+    def hot_count(self):
+        return self.hot.count()
+
+    def count(self):
+        return self.hot_count + archived_count(self.cold, self.key)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = index.stop
+        border = self.hot_count
+        if stop is not None and stop <= border:
+            return self.hot[start:stop]
+        cold_stop = None if stop is None else stop - border
+        if start >= border:
+            return self.cold[start - border:cold_stop]
+        return _Slice(self.hot[start:], self.cold[:cold_stop])
+
+
+def _posts(queryset):
+    return queryset.select_related('author', 'group')
+
+
+def _tiers(hot, cold, **kwargs):
+    return TieredFeed(_posts(hot), _posts(cold), **kwargs)
+
+
+def index_feed():
+    return _tiers(Post.objects.all(), ArchivedPost.objects.all(),
+                  key='index')
+
+
+def group_feed(group, hot_count=None):
+    return _tiers(group.posts.all(), group.archived_posts.all(),
+                  key=f'group:{group.pk}', hot_count=hot_count)
+
+
+def profile_feed(author):
+    return _tiers(author.posts.all(), author.archived_posts.all(),
+                  key=f'author:{author.pk}')
+
+
+def _follow_key(user):
+    return f'follow:{user.pk}'
+
+
+def follow_feed(user):
+    return _tiers(Post.objects.filter(author__following__user=user),
+                  ArchivedPost.objects.filter(author__following__user=user),
+                  key=_follow_key(user))
+
+
+def follows_changed(user):
+    """Сбросить число архивных постов ленты подписок пользователя."""
+    cache.delete(COUNT_KEY.format(_follow_key(user), version()))
+
+
+def get_post(post_id):
+    """Вернуть пост и признак архива; 404, если поста нет нигде."""
+    post = _posts(Post.objects.filter(id=post_id)).first()
+    if post is not None:
+        return post, False
+    post = _posts(ArchivedPost.objects.filter(id=post_id)).first()
+    if post is None:
+        raise Http404('Пост не найден')
+    return post, True
+
+
+def archive_posts(before, batch_size=None, pause=0):
+    """Перенести видимые посты старше before в архив пачками.
+
+    Посты копируются вместе с видимыми комментариями, ревизии и
+    уведомления переводятся на архивный пост, и посты удаляются из
+    горячей таблицы в той же транзакции. Возвращает число постов.
+    """
+    old = Post.objects.filter(created__lt=before)
+    size = batch_size or settings.MODERATION_BATCH_SIZE
+    moved = 0
+    groups = set()
+    while True:
+        posts = list(old.order_by('created')[:size])
+        if not posts:
+            break
+        ids = [post.pk for post in posts]
+        with transaction.atomic():
+            ArchivedPost.objects.bulk_create(
+                ArchivedPost(
+                    id=post.pk, created=post.created, updated=post.updated,
+                    text=post.text,
+                    author_id=post.author_id, group_id=post.group_id,
+                    image=post.image
+                )
+                for post in posts
+            )
+            ArchivedComment.objects.bulk_create(
+                ArchivedComment(
+                    id=comment.pk, created=comment.created,
+                    post_id=comment.post_id, author_id=comment.author_id,
+                    text=comment.text
+                )
+                for comment in Comment.objects.filter(post_id__in=ids)
+            )
+            for model in (PostRevision, Notification):
+                model.objects.filter(post_id__in=ids).update(
+                    archived_post_id=F('post_id'), post=None
+                )
+            moderation.raw_delete(Post, ids)
+        groups.update(post.group_id for post in posts)
+        moved += len(posts)
+        if len(posts) < size:
+            break
+        time.sleep(pause)
+    if moved:
+        bump_version()
+        feeds.refresh_groups(*groups)
+    return moved
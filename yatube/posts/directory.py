@@ -0,0 +1,93 @@
+"""Каталог групп.
+
+Число постов, последняя активность и активность за сутки берутся из
+таблицы GroupStats. Её пересчитывает команда refresh_group_stats
+несколькими GROUP BY на все группы сразу, поэтому страница каталога
+не агрегирует posts_post на каждый запрос.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from .models import ArchivedPost, Comment, Group, GroupStats, Post
+
+SORTS = {
+    'title': ('title',),
+    'posts': (F('stats__posts_count').desc(nulls_last=True), 'title'),
+    'trending': (F('stats__activity_24h').desc(nulls_last=True),
+                 F('stats__last_activity').desc(nulls_last=True), 'title'),
+}
+
+
+def _per_group(queryset, group_field, **aggregates):
+    return {
+        row.pop(group_field): row
+        for row in queryset.values(group_field).annotate(**aggregates)
+        .order_by()
+    }
+
+
+def refresh_stats(now=None):
+    """Пересчитать агрегаты всех групп. Возвращает число групп."""
+    now = now or timezone.now()
+    since = now - timedelta(days=1)
+    posts = _per_group(
+        Post.objects.filter(group__isnull=False), 'group',
+        count=Count('pk'), last=Max('created')
+    )
+    archived = _per_group(
+        ArchivedPost.objects.filter(group__isnull=False), 'group',
+        count=Count('pk')
+    )
+    comments = _per_group(
+        Comment.objects.filter(post__group__isnull=False,
+                               post__is_hidden=False),
+        'post__group', last=Max('created')
+    )
+    recent_posts = _per_group(
+        Post.objects.filter(group__isnull=False, created__gte=since),
+        'group', count=Count('pk')
+    )
+    recent_comments = _per_group(
+        Comment.objects.filter(post__group__isnull=False,
+                               post__is_hidden=False, created__gte=since),
+        'post__group', count=Count('pk')
+    )
+    existing = GroupStats.objects.in_bulk()
+    changed, created = [], []
+    for group_id in Group.objects.values_list('pk', flat=True):
+        activity = [
+            row['last'] for row in (posts.get(group_id),
+                                    comments.get(group_id)) if row
+        ]
+        values = {
+            'posts_count': (posts.get(group_id, {}).get('count', 0)
+                            + archived.get(group_id, {}).get('count', 0)),
+            'last_activity': max(activity) if activity else None,
+            'activity_24h': (
+                recent_posts.get(group_id, {}).get('count', 0)
+                + recent_comments.get(group_id, {}).get('count', 0)
+            ),
+            'refreshed': now,
+        }
+        stats = existing.get(group_id)
+        if stats is None:
+            created.append(GroupStats(group_id=group_id, **values))
+            continue
+        for name, value in values.items():
+            setattr(stats, name, value)
+        changed.append(stats)
+    GroupStats.objects.bulk_create(created)
+    GroupStats.objects.bulk_update(
+        changed,
+        ['posts_count', 'last_activity', 'activity_24h', 'refreshed']
+    )
+    return len(created) + len(changed)
+
+
+def groups(sort):
+    """Группы со статистикой в порядке сортировки sort."""
+    return Group.objects.select_related('stats').order_by(
+        *SORTS.get(sort, SORTS['title'])
+    )
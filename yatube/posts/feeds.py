@@ -0,0 +1,154 @@
+"""Материализованные первые страницы лент горячих групп.
+
+Для каждой группы считаются запросы к её ленте за окно
+GROUP_FEED_HOT_WINDOW. Группа, набравшая GROUP_FEED_HOT_HITS запросов,
+становится горячей: в общем кэше хранится состояние её ленты
+(число постов с учётом архива, число горячих постов, id постов первых
+GROUP_FEED_PAGES страниц и версия), а посты этих страниц кэшируются
+с версией в ключе.
+Сохранение поста через PostForm обновляет состояние точечно.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import archive
+from .models import ArchivedPost, Post
+from .utils import cached_page, paginator
+
+HITS_KEY = 'group_feed:hits:{}'
+HOT_KEY = 'group_feed:hot'
+STATE_KEY = 'group_feed:state:{}'
+PAGE_KEY = 'group_feed:page:{}:{}'
+
+
+def _limit():
+    return settings.GROUP_FEED_PAGES * settings.POSTS_ON_PAGE
+
+
+def _version():
+    return int(time.time() * 1000)
+
+
+def hot_groups():
+    """Вернуть словарь {id группы: число запросов} горячих групп."""
+    now = time.time()
+    return {
+        group_id: hits
+        for group_id, (expires, hits) in cache.get(HOT_KEY, {}).items()
+        if expires > now
+    }
+
+
+def register_hit(group_id):
+    """Учесть запрос к ленте группы и вернуть признак горячей группы."""
+    key = HITS_KEY.format(group_id)
+    cache.add(key, 0, settings.GROUP_FEED_HOT_WINDOW)
+    try:
+        hits = cache.incr(key)
+    except ValueError:
+        # Счётчик истёк между add и incr.
+        cache.set(key, 1, settings.GROUP_FEED_HOT_WINDOW)
+        hits = 1
+    if hits == settings.GROUP_FEED_HOT_HITS:
+        now = time.time()
+        hot = {
+            pk: value for pk, value in cache.get(HOT_KEY, {}).items()
+            if value[0] > now
+        }
+        hot[group_id] = (now + settings.GROUP_FEED_TIMEOUT, hits)
+        cache.set(HOT_KEY, hot, None)
+        return True
+    return group_id in hot_groups()
+
+
+def build_state(group_id):
+    """Собрать состояние ленты группы и положить его в кэш."""
+    posts = Post.objects.filter(group_id=group_id)
+    hot_count = posts.count()
+    archived = archive.archived_count(
+        ArchivedPost.objects.filter(group_id=group_id), f'group:{group_id}'
+    )
+    state = {
+        'count': hot_count + archived,
+        'hot_count': hot_count,
+        'ids': list(posts.values_list('pk', flat=True)[:_limit()]),
+        'version': _version(),
+    }
+    cache.set(STATE_KEY.format(group_id), state, settings.GROUP_FEED_TIMEOUT)
+    return state
+
+
+def get_state(group_id):
+    """Вернуть состояние ленты группы, собрав его при промахе кэша."""
+    state = cache.get(STATE_KEY.format(group_id))
+    if state is None:
+        state = build_state(group_id)
+    return state
+
+
+def group_page(group, request):
+    """Вернуть контекст страницы ленты группы.
+
+    Для горячей группы число постов и посты первых страниц берутся
+    из кэша, а в контекст добавляется версия ленты.
+    """
+    context = {'feed_version': None}
+    # Прогрев (posts.warmup) не считается запросом пользователя.
+    if getattr(request, 'warmup', False):
+        hot = group.pk in hot_groups()
+    else:
+        hot = register_hit(group.pk)
+    if not hot:
+        context['page_obj'] = paginator(archive.group_feed(group), request)
+        return context
+    state = get_state(group.pk)
+    posts = archive.group_feed(group, hot_count=state['hot_count'])
+    page_obj = paginator(posts, request, count=state['count'])
+    if (page_obj.number <= settings.GROUP_FEED_PAGES
+            and page_obj.end_index() <= state['hot_count']):
+        ids = state['ids'][page_obj.start_index() - 1:page_obj.end_index()]
+        page_obj.object_list = posts.hot.filter(pk__in=ids)
+        cached_page(page_obj, PAGE_KEY.format(group.pk, state['version']),
+                    settings.GROUP_FEED_TIMEOUT)
+        context['feed_version'] = state['version']
+    context['page_obj'] = page_obj
+    return context
+
+
+def post_created(post):
+    """Добавить новый пост в начало ленты его группы."""
+    if post.group_id is None:
+        return
+    key = STATE_KEY.format(post.group_id)
+    state = cache.get(key)
+    if state is None:
+        return
+    state['ids'] = [post.pk] + state['ids'][:_limit() - 1]
+    state['count'] += 1
+    state['hot_count'] += 1
+    state['version'] = _version()
+    cache.set(key, state, settings.GROUP_FEED_TIMEOUT)
+
+
+def post_changed(post, old_group_id):
+    """Обновить ленты групп после редактирования поста."""
+    if old_group_id == post.group_id:
+        key = STATE_KEY.format(post.group_id)
+        state = cache.get(key)
+        if state is not None and post.pk in state['ids']:
+            state['version'] = _version()
+            cache.set(key, state, settings.GROUP_FEED_TIMEOUT)
+        return
+    refresh_groups(old_group_id, post.group_id)
+
+
+def refresh_groups(*group_ids):
+    """Пересобрать ленты горячих групп и сбросить ленты остальных."""
+    hot = hot_groups()
+    for group_id in set(group_ids) - {None}:
+        if group_id in hot:
+            build_state(group_id)
+        else:
+            cache.delete(STATE_KEY.format(group_id))
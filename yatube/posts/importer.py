@@ -0,0 +1,262 @@
+"""Массовый импорт постов и комментариев из NDJSON или CSV.
+
+Файл читается построчно. Каждая запись — словарь с полем type
+("post" по умолчанию или "comment"). У поста: id (id в старой
+системе), author (username), group (slug), text, created, image;
+у комментария: post (id поста в старой системе), author, text, created.
+Авторы и группы ищутся по словарям в памяти, загруженным один раз;
+недостающие группы создаются по slug.
+
+Нераспознанные строки и записи с неверными датами пропускаются как
+invalid с номером записи в stats.errors. Автор (с --create-authors —
+новый пользователь) ищется только для записи, прошедшей остальные
+проверки.
+Записи копятся пачками и пишутся bulk_create в отдельных транзакциях.
+bulk_create заменяет даты текущим временем (auto_now), поэтому даты
+из файла возвращаются одним UPDATE на пачку (restore_dates).
+bulk_create не шлёт сигналов, поэтому уведомления и точечные
+обновления лент не срабатывают. id новым строкам выдаются явно (после
+максимального id горячей и архивной таблиц), чтобы связать комментарии
+с постами без повторного чтения; импорт нужно запускать без
+параллельной записи постов. В конце последовательности id
+сдвигаются, посты старше POSTS_ARCHIVE_AFTER_DAYS переносятся в архив
+(posts.archive), а ленты групп, каталог групп и рейтинги
+пересчитываются один раз.
+"""
+import csv
+import json
+import math
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Case, Count, DateTimeField, Max, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import archive, directory, feeds, ranking
+from .models import ArchivedComment, ArchivedPost, Comment, Group, Post
+
+User = get_user_model()
+
+# Сколько ошибок разбора записей запоминать для отчёта.
+MAX_ERRORS = 20
+
+
+class ImportStats:
+    """Счётчики импорта: записано и пропущено по причинам."""
+
+    def __init__(self):
+        self.posts = 0
+        self.comments = 0
+        self.archived = 0
+        self.skipped = Counter()
+        self.errors = []
+
+
+def read(stream, fmt):
+    """Записи из файла: словари по строкам NDJSON или CSV.
+
+    На месте нераспознанной строки NDJSON отдаётся ValueError.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                yield error
+
+
+def _next_id(*models):
+    return max(
+        model._base_manager.aggregate(last=Max('id'))['last'] or 0
+        for model in models
+    ) + 1
+
+
+def restore_dates(model, dates):
+    """Записать created и updated из пар (id, дата) одним UPDATE."""
+    if not dates:
+        return
+    value = Case(
+        *[When(pk=pk, then=Value(created)) for pk, created in dates],
+        output_field=DateTimeField()
+    )
+    model._base_manager.filter(pk__in=[pk for pk, _ in dates]).update(
+        created=value, updated=value
+    )
+
+
+class Importer:
+    def __init__(self, batch_size, create_authors=False):
+        self.batch_size = batch_size
+        self.create_authors = create_authors
+        self.authors = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.followers = dict(
+            User.objects.annotate(count=Count('following'))
+            .filter(count__gt=0).values_list('id', 'count')
+        )
+        self.post_ids = {}
+        self.next_post = _next_id(Post, ArchivedPost)
+        self.next_comment = _next_id(Comment, ArchivedComment)
+        self.posts = []
+        self.comments = []
+        # Рейтинг получают только свежие посты: {id: число комментариев}.
+        self.scored = Counter()
+        self.touched_groups = set()
+        self.now = timezone.now()
+        self.stats = ImportStats()
+
+    def _author(self, username):
+        if username in self.authors:
+            return self.authors[username]
+        if not username or not self.create_authors:
+            return None
+        user = User(username=username)
+        user.set_unusable_password()
+        user.save()
+        self.authors[username] = user.pk
+        return user.pk
+
+    def _group(self, slug):
+        if not slug:
+            return None
+        if slug not in self.groups:
+            self.groups[slug] = Group.objects.create(
+                title=slug, slug=slug, description=''
+            ).pk
+        return self.groups[slug]
+
+    def _created(self, record):
+        value = record.get('created')
+        if not value:
+            return self.now
+        if not isinstance(value, str):
+            raise ValueError(f'created не строка: {value!r}')
+        created = parse_datetime(value)
+        if created is None:
+            raise ValueError(f'неверная дата created: {value}')
+        if timezone.is_naive(created):
+            created = timezone.make_aware(created)
+        return created
+
+    def _score(self, author_id, created):
+        hours = max((self.now - created).total_seconds() / 3600, 0)
+        score = (settings.POPULAR_FOLLOWER_WEIGHT
+                 * math.log1p(self.followers.get(author_id, 0))
+                 * ranking.decay_factor(hours))
+        return score if score >= settings.POPULAR_MIN_SCORE else 0
+
+    def add(self, record):
+        """Добавить запись в пачку; ValueError для неверной записи."""
+        if isinstance(record, ValueError):
+            raise record
+        if not isinstance(record, dict):
+            raise ValueError('запись не является объектом')
+        created = self._created(record)
+        if not record.get('text'):
+            self.stats.skipped['text'] += 1
+            return
+        if (record.get('type') or 'post') == 'comment':
+            self._add_comment(record, created)
+        else:
+            self._add_post(record, created)
+        if len(self.posts) + len(self.comments) >= self.batch_size:
+            self.flush()
+
+    def _author_id(self, record):
+        # Автор ищется (и создаётся) последним: пропущенная запись
+        # не оставляет пользователей.
+        author_id = self._author(record.get('author'))
+        if author_id is None:
+            self.stats.skipped['author'] += 1
+        return author_id
+
+    def _add_comment(self, record, created):
+        post_id = self.post_ids.get(str(record.get('post')))
+        if post_id is None:
+            self.stats.skipped['post'] += 1
+            return
+        author_id = self._author_id(record)
+        if author_id is None:
+            return
+        self.comments.append(Comment(
+            id=self.next_comment, post_id=post_id, author_id=author_id,
+            text=record['text'], created=created, updated=created
+        ))
+        self.next_comment += 1
+        if post_id in self.scored:
+            self.scored[post_id] += 1
+
+    def _add_post(self, record, created):
+        author_id = self._author_id(record)
+        if author_id is None:
+            return
+        post = Post(
+            id=self.next_post, author_id=author_id,
+            group_id=self._group(record.get('group')),
+            text=record['text'], image=record.get('image') or '',
+            created=created, updated=created,
+            score=self._score(author_id, created)
+        )
+        if record.get('id'):
+            self.post_ids[str(record['id'])] = post.pk
+        if post.score:
+            self.scored[post.pk] = 0
+        self.touched_groups.add(post.group_id)
+        self.posts.append(post)
+        self.next_post += 1
+
+    def flush(self):
+        # bulk_create перезапишет даты объектов, запоминаем их заранее.
+        post_dates = [(post.pk, post.created) for post in self.posts]
+        comment_dates = [(c.pk, c.created) for c in self.comments]
+        with transaction.atomic():
+            # Посты раньше комментариев: комментарии на них ссылаются.
+            Post.objects.bulk_create(self.posts, self.batch_size)
+            Comment.objects.bulk_create(self.comments, self.batch_size)
+            restore_dates(Post, post_dates)
+            restore_dates(Comment, comment_dates)
+        self.stats.posts += len(self.posts)
+        self.stats.comments += len(self.comments)
+        self.posts, self.comments = [], []
+
+    def finish(self):
+        """Дописать остаток и один раз пересчитать производные данные."""
+        self.flush()
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [Post, Comment]):
+                cursor.execute(sql)
+        # Посты старше срока архива сразу уходят в архив, чтобы горячая
+        # таблица оставалась новее архивной (posts.archive.TieredFeed).
+        self.stats.archived = archive.archive_posts(
+            self.now - timedelta(days=settings.POSTS_ARCHIVE_AFTER_DAYS),
+            self.batch_size
+        )
+        for post_id, count in self.scored.items():
+            if count:
+                ranking.comment_added(post_id, count)
+        feeds.refresh_groups(*self.touched_groups)
+        directory.refresh_stats()
+        return self.stats
+
+
+def import_records(records, batch_size, create_authors=False):
+    """Импортировать записи; вернуть ImportStats."""
+    importer = Importer(batch_size, create_authors)
+    for number, record in enumerate(records, 1):
+        try:
+            importer.add(record)
+        except (ValueError, OverflowError) as error:
+            importer.stats.skipped['invalid'] += 1
+            if len(importer.stats.errors) < MAX_ERRORS:
+                importer.stats.errors.append(f'запись {number}: {error}')
+    return importer.finish()
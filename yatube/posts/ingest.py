@@ -0,0 +1,186 @@
+"""Приём комментариев.
+
+Перед записью комментарий проходит лимит частоты на пользователя
+(TokenBucket в общем кэше) и проверку на повтор: одинаковый текст
+от того же автора к тому же посту в пределах COMMENT_DUPLICATE_WINDOW
+молча отбрасывается. Принятые комментарии копятся в буфере процесса
+и пишутся одним bulk_create, когда в буфере COMMENT_BUFFER_SIZE штук
+или прошло COMMENT_BUFFER_SECONDS. Пока комментарий в буфере, автор
+видит его на странице поста из кэша ожидающих.
+
+Комментарии к постам, удалённым или перенесённым в архив за время
+ожидания, отбрасываются. Если запись пачки не удалась, пачка
+возвращается в буфер и повторяется до COMMENT_BUFFER_RETRIES раз.
+Буфер живёт в памяти процесса и сбрасывается при его штатном
+завершении; при аварийном падении воркера незаписанные комментарии
+теряются, поэтому буфер больше 1 включается только там, где это
+приемлемо.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+
+from core.ratelimit import TokenBucket
+
+from . import ranking
+from .models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 'comment:seen:{}'
+PENDING_KEY = 'comment:pending:{}:{}'
+
+bucket = TokenBucket('comment', *settings.COMMENT_THROTTLE)
+
+
+class CommentRejected(Exception):
+    """Комментарий отклонён лимитом частоты."""
+
+
+def _digest(user_id, post_id, text):
+    normalized = ' '.join(text.split()).lower()
+    return hashlib.sha1(
+        f'{user_id}:{post_id}:{normalized}'.encode()
+    ).hexdigest()
+
+
+class CommentBuffer:
+    """Буфер отложенной записи комментариев."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = []
+        self.timer = None
+        self.attempts = 0
+
+    def _schedule(self):
+        if self.timer is None:
+            self.timer = threading.Timer(
+                settings.COMMENT_BUFFER_SECONDS, self._flush_in_thread
+            )
+            self.timer.daemon = True
+            self.timer.start()
+
+    def add(self, comment):
+        with self.lock:
+            self.items.append(comment)
+            full = len(self.items) >= settings.COMMENT_BUFFER_SIZE
+            if not full:
+                self._schedule()
+        if full:
+            self.flush()
+
+    def _take(self):
+        with self.lock:
+            items, self.items = self.items, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        return items
+
+    def _requeue(self, items):
+        """Вернуть несохранённую пачку в начало буфера."""
+        with self.lock:
+            self.attempts += 1
+            if self.attempts > settings.COMMENT_BUFFER_RETRIES:
+                self.attempts = 0
+                logger.error('Комментарии потеряны после %s попыток: %s',
+                             settings.COMMENT_BUFFER_RETRIES,
+                             [(c.author_id, c.post_id) for c in items])
+                return
+            self.items = items + self.items
+            self._schedule()
+
+    def flush(self):
+        """Записать накопленные комментарии; вернуть их число."""
+        items = self._take()
+        if not items:
+            return 0
+        alive = set(Post.objects.filter(
+            pk__in={c.post_id for c in items}
+        ).values_list('pk', flat=True))
+        for comment in items:
+            if comment.post_id not in alive:
+                cache.delete(PENDING_KEY.format(comment.author_id,
+                                                comment.post_id))
+        items = [c for c in items if c.post_id in alive]
+        if not items:
+            return 0
+        try:
+            Comment.objects.bulk_create(items)
+        except DatabaseError:
+            logger.exception('Не удалось записать %s комментариев',
+                             len(items))
+            self._requeue(items)
+            return 0
+        self.attempts = 0
+        # bulk_create не шлёт post_save, рейтинг обновляем сами.
+        for post_id, count in Counter(c.post_id for c in items).items():
+            ranking.comment_added(post_id, count)
+        for comment in items:
+            cache.delete(PENDING_KEY.format(comment.author_id,
+                                            comment.post_id))
+        return len(items)
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+
+buffer = CommentBuffer()
+atexit.register(buffer.flush)
+
+
+def submit(form, post, user):
+    """Принять комментарий из валидной формы.
+
+    Возвращает несохранённый комментарий или None для повтора;
+    при превышении лимита бросает CommentRejected.
+    """
+    text = form.cleaned_data['text']
+    digest = _digest(user.pk, post.pk, text)
+    if not cache.add(DUPLICATE_KEY.format(digest), True,
+                     settings.COMMENT_DUPLICATE_WINDOW):
+        return None
+    if not bucket.consume(user.pk):
+        cache.delete(DUPLICATE_KEY.format(digest))
+        raise CommentRejected(
+            'Слишком много комментариев. Попробуйте через минуту.'
+        )
+    comment = form.save(commit=False)
+    comment.author = user
+    comment.post = post
+    key = PENDING_KEY.format(user.pk, post.pk)
+    pending = cache.get(key, [])
+    pending.append(comment.text)
+    cache.set(key, pending, settings.COMMENT_BUFFER_SECONDS * 2)
+    buffer.add(comment)
+    return comment
+
+
+def pending(user, post_id):
+    """Тексты ещё не записанных комментариев user к посту."""
+    if not user.is_authenticated:
+        return []
+    return cache.get(PENDING_KEY.format(user.pk, post_id)) or []
+
+
+def with_pending(comments, post, user):
+    """Комментарии поста вместе с ещё не записанными комментариями user."""
+    comments = list(comments)
+    texts = pending(user, post.pk)
+    if not texts:
+        return comments
+    saved = {c.text for c in comments if c.author_id == user.pk}
+    return comments + [
+        Comment(post=post, author=user, text=text)
+        for text in texts if text not in saved
+    ]
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.management.base import CronCommand
+from posts.archive import archive_posts
+
+
+class Command(CronCommand):
+    help = ('Перенести старые посты с комментариями в архивные таблицы. '
+            'Запускать по расписанию в часы низкой нагрузки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.POSTS_ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше стольких дней'
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.MODERATION_BATCH_SIZE,
+            help='Сколько постов переносить в одной транзакции'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Пауза между пачками, секунд'
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        moved = archive_posts(
+            before, options['batch_size'], options['pause']
+        )
+        self.stdout.write(f'Перенесено в архив: {moved}')
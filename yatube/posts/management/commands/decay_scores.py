@@ -0,0 +1,20 @@
+from django.conf import settings
+
+from core.management.base import CronCommand
+from posts.ranking import decay
+
+
+class Command(CronCommand):
+    help = ('Состарить рейтинги ленты «Популярное». Запускать по '
+            'расписанию раз в POPULAR_DECAY_INTERVAL_HOURS часов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=float,
+            default=settings.POPULAR_DECAY_INTERVAL_HOURS,
+            help='Сколько часов прошло с прошлого запуска'
+        )
+
+    def handle(self, *args, **options):
+        count = decay(options['hours'])
+        self.stdout.write(f'Рейтингов обновлено: {count}')
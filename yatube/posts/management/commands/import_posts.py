@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.importer import import_records, read
+
+
+class Command(BaseCommand):
+    help = ('Импортировать посты и комментарии из NDJSON или CSV. '
+            'Запускать без параллельной записи постов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .ndjson или .csv')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'),
+            help='Формат файла; по умолчанию по расширению'
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.MODERATION_BATCH_SIZE,
+            help='Сколько записей писать в одной транзакции'
+        )
+        parser.add_argument(
+            '--create-authors', action='store_true',
+            help='Создавать неизвестных авторов без пароля'
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or (
+            'csv' if options['path'].endswith('.csv') else 'ndjson'
+        )
+        started = time.monotonic()
+        with open(options['path'], encoding='utf-8', newline='') as stream:
+            stats = import_records(
+                read(stream, fmt), options['batch_size'],
+                options['create_authors']
+            )
+        elapsed = time.monotonic() - started
+        rows = stats.posts + stats.comments
+        self.stdout.write(
+            f'Импортировано: постов {stats.posts}, комментариев '
+            f'{stats.comments} за {elapsed:.1f} с '
+            f'({rows / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+        if stats.archived:
+            self.stdout.write(f'Перенесено в архив: {stats.archived}')
+        for reason, count in sorted(stats.skipped.items()):
+            self.stdout.write(f'Пропущено ({reason}): {count}')
+        for error in stats.errors:
+            self.stdout.write(f'  {error}')
@@ -0,0 +1,46 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import CommandError
+
+from core.management.base import CronCommand
+from posts.media_gc import collect
+
+
+class Command(CronCommand):
+    help = ('Удалить картинки, на которые не ссылаются посты, их '
+            'миниатюры и устаревшие записи sorl-thumbnail.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=float, default=24,
+            help='Не трогать файлы моложе стольких часов'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Потоков для обхода каталогов'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько записей KV удалять за раз'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, ничего не удалять'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = collect(
+                min_age=options['min_age'] * 3600,
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+            )
+        except ImproperlyConfigured as error:
+            raise CommandError(error)
+        prefix = 'Можно удалить' if options['dry_run'] else 'Удалено'
+        self.stdout.write(
+            f'{prefix}: оригиналов {result["originals"]}, '
+            f'миниатюр {result["thumbnails"]}, '
+            f'записей KV {result["kv_entries"]}; '
+            f'освобождено {result["bytes"] / 1024 / 1024:.1f} МБ'
+        )
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.management.base import CronCommand
+from posts.models import Comment, Post
+from posts.moderation import purge_hidden
+
+
+class Command(CronCommand):
+    help = ('Физически удалить посты и комментарии, скрытые дольше '
+            'заданного срока. Запускать по расписанию в часы низкой '
+            'нагрузки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.HIDDEN_PURGE_AFTER_DAYS,
+            help='Удалять объекты, скрытые больше стольких дней назад'
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.MODERATION_BATCH_SIZE,
+            help='Сколько строк удалять в одной транзакции'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Пауза между пачками, секунд'
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        # Комментарии первыми: иначе их удалит каскад от постов.
+        for model in (Comment, Post):
+            purged = purge_hidden(
+                model, before, options['batch_size'], options['pause']
+            )
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: удалено {purged}'
+            )
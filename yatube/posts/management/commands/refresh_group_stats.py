@@ -0,0 +1,11 @@
+from core.management.base import CronCommand
+from posts.directory import refresh_stats
+
+
+class Command(CronCommand):
+    help = ('Пересчитать агрегаты каталога групп. Запускать по '
+            'расписанию, например раз в несколько минут.')
+
+    def handle(self, *args, **options):
+        count = refresh_stats()
+        self.stdout.write(f'Групп пересчитано: {count}')
@@ -0,0 +1,17 @@
+from core.management.base import CronCommand
+from posts.notifications import send_digests
+
+
+class Command(CronCommand):
+    help = ('Отправить подписчикам дайджесты новых постов. Запускать '
+            'по расписанию, например раз в час.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько получателей обрабатывать за один проход'
+        )
+
+    def handle(self, *args, **options):
+        sent = send_digests(options['batch_size'])
+        self.stdout.write(f'Отправлено писем: {sent}')
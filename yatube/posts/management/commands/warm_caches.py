@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from core.management.base import CronCommand
+from posts.warmup import warm_caches
+
+
+class Command(CronCommand):
+    help = ('Прогреть шаблоны, миниатюры и первые страницы лент. '
+            'Завершается с ошибкой, если прогрев не удался, поэтому '
+            'подходит как проверка готовности после деплоя.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=settings.WARM_CACHES_PAGES,
+            help='Сколько первых страниц каждой ленты прогревать'
+        )
+        parser.add_argument(
+            '--groups', type=int, default=settings.WARM_CACHES_GROUPS,
+            help='Сколько самых популярных групп прогревать'
+        )
+        parser.add_argument(
+            '--profiles', type=int, default=settings.WARM_CACHES_PROFILES,
+            help='Сколько самых активных авторов прогревать'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.WARM_CACHES_WORKERS,
+            help='Размер пула потоков'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        done, errors = warm_caches(
+            options['pages'],
+            options['groups'],
+            options['profiles'],
+            options['workers'],
+        )
+        for error in errors:
+            self.stderr.write(error)
+        if errors:
+            raise CommandError(
+                f'Прогрев не удался: {len(errors)} ошибок из {done} задач'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето задач: {done} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
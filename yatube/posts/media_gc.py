@@ -0,0 +1,164 @@
+"""Сборка мусора в MEDIA_ROOT.
+
+Оригиналы в media/posts, на которые не ссылается ни один пост (в том
+числе скрытый или архивный), удаляются. Записи sorl-thumbnail в KV о
+таких картинках и о пропавших миниатюрах удаляются пачками, а файлы
+в media/cache, которых нет в KV, считаются осиротевшими миниатюрами.
+Каталоги обходятся os.scandir в пуле потоков по уровням дерева.
+Файлы моложе min_age не трогаются: картинка могла быть загружена,
+а пост с ней ещё не сохранён.
+
+Публичный API хранилища KV sorl не умеет перечислять записи и удалять
+их пачками, поэтому используются его закрытые методы. Они проверены на
+версиях SORL_KVSTORE_VERSIONS; на других сборка мусора не запускается.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .models import ArchivedPost, Post
+from .moderation import batches
+
+ORIGINALS_DIR = 'posts'
+SORL_KVSTORE_VERSIONS = ('12.6.',)
+
+
+def referenced_images():
+    """Имена картинок, на которые ссылаются посты."""
+    names = set()
+    for model in (Post.all_objects, ArchivedPost.objects):
+        names.update(
+            model.exclude(image='').exclude(image=None)
+            .values_list('image', flat=True).iterator()
+        )
+    return names
+
+
+def _scan_dir(directory):
+    files, dirs = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+    return files, dirs
+
+
+def scan(root, workers):
+    """Все файлы под root: список (путь, размер, mtime)."""
+    if not os.path.isdir(root):
+        return []
+    found = []
+    level = [root]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while level:
+            next_level = []
+            for files, dirs in executor.map(_scan_dir, level):
+                found += files
+                next_level += dirs
+            level = next_level
+    return found
+
+
+def _media_name(path):
+    return os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+
+
+def _remove(files, dry_run):
+    """Удалить файлы; вернуть освобождённые байты."""
+    reclaimed = 0
+    for path, size, _ in files:
+        if not dry_run:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+        reclaimed += size
+    return reclaimed
+
+
+def _sorl():
+    # Импорт здесь: sorl тянет PIL, а модуль нужен только команде.
+    import sorl
+    from sorl.thumbnail import default
+    from sorl.thumbnail.conf import settings as thumbnail_settings
+    from sorl.thumbnail.kvstores.base import add_prefix
+
+    if not sorl.__version__.startswith(SORL_KVSTORE_VERSIONS):
+        raise ImproperlyConfigured(
+            f'media_gc не проверен с sorl-thumbnail {sorl.__version__}'
+        )
+    return default.kvstore, add_prefix, thumbnail_settings.THUMBNAIL_PREFIX
+
+
+def compact_kvstore(referenced, batch_size, dry_run):
+    """Удалить записи KV о неиспользуемых картинках.
+
+    Возвращает число удалённых записей и имена живых миниатюр.
+    """
+    kvstore, add_prefix, _ = _sorl()
+    stale, live_keys, live_names = [], set(), set()
+    for key in kvstore._find_keys(identity='thumbnails'):
+        source = kvstore._get(key)
+        thumbnail_keys = kvstore._get(key, identity='thumbnails') or []
+        if source is None or source.name not in referenced:
+            stale.append(add_prefix(key, 'thumbnails'))
+            stale += [add_prefix(thumb, 'image') for thumb in thumbnail_keys]
+            continue
+        for thumbnail_key in thumbnail_keys:
+            thumbnail = kvstore._get(thumbnail_key)
+            if thumbnail is not None:
+                live_keys.add(thumbnail_key)
+                live_names.add(thumbnail.name)
+    stale_set = set(stale)
+    for key in kvstore._find_keys(identity='image'):
+        if key in live_keys or add_prefix(key, 'image') in stale_set:
+            continue
+        image = kvstore._get(key)
+        if image is None or image.name not in referenced:
+            stale.append(add_prefix(key, 'image'))
+    if not dry_run:
+        for batch in batches(stale, batch_size):
+            kvstore._delete_raw(*batch)
+    return len(stale), live_names
+
+
+def collect(min_age=0, workers=4, batch_size=500, dry_run=False):
+    """Удалить осиротевшие картинки, миниатюры и записи KV.
+
+    Возвращает словарь со счётчиками и освобождёнными байтами.
+    """
+    # Версию sorl проверяем до того, как что-то удалить.
+    thumbnails_dir = _sorl()[2]
+    cutoff = time.time() - min_age
+    referenced = referenced_images()
+
+    originals = [
+        item for item in scan(
+            os.path.join(settings.MEDIA_ROOT, ORIGINALS_DIR), workers
+        )
+        if item[2] < cutoff and _media_name(item[0]) not in referenced
+    ]
+    reclaimed = _remove(originals, dry_run)
+
+    kv_deleted, live_thumbnails = compact_kvstore(
+        referenced, batch_size, dry_run
+    )
+    thumbnails = [
+        item for item in scan(
+            os.path.join(settings.MEDIA_ROOT, thumbnails_dir), workers
+        )
+        if item[2] < cutoff and _media_name(item[0]) not in live_thumbnails
+    ]
+    reclaimed += _remove(thumbnails, dry_run)
+    return {
+        'originals': len(originals),
+        'thumbnails': len(thumbnails),
+        'kv_entries': kv_deleted,
+        'bytes': reclaimed,
+    }
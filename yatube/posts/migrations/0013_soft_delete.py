@@ -0,0 +1,66 @@
+# Generated by Django 2.2.6 on 2026-10-19 08:12
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_hidden(apps, schema_editor):
+    """Скрытым до появления hidden_at объектам ставим текущее время."""
+    for name in ('Post', 'Comment'):
+        model = apps.get_model('posts', name)
+        model._base_manager.filter(
+            is_hidden=True, hidden_at__isnull=True
+        ).update(hidden_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_auto_20261019_0810'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_group_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_author_created_idx',
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='hidden_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата скрытия'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='hidden_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата скрытия'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(is_hidden=False), fields=['post', 'created'], name='comment_visible_post_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(is_hidden=True), fields=['hidden_at'], name='comment_hidden_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_hidden=False), fields=['-created'], name='post_visible_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_hidden=False), fields=['group', '-created'], name='post_group_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_hidden=False), fields=['author', '-created'], name='post_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_hidden=True), fields=['hidden_at'], name='post_hidden_at_idx'),
+        ),
+        migrations.RunPython(stamp_hidden, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.6 on 2026-10-19 08:18
+
+from django.db import migrations, models
+from django.db.models import F
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copy_created(apps, schema_editor):
+    """Существующим объектам дата изменения равна дате создания."""
+    for name in ('Post', 'Comment', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        model._base_manager.update(updated=F('created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='updated',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.CreateModel(
+            name='PostRevision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата создания')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('diff', models.TextField(verbose_name='Изменения')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Версия поста',
+                'verbose_name_plural': 'Версии постов',
+                'ordering': ('-created', '-pk'),
+            },
+        ),
+        migrations.RunPython(copy_created, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.6 on 2026-10-19 08:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='score',
+            field=models.FloatField(default=0, verbose_name='Рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_hidden', False), ('score__gt', 0)), fields=['-score', '-id'], name='post_popular_idx'),
+        ),
+    ]
@@ -1,10 +1,32 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
 from core.models import CreatedModel
 
 User = get_user_model()
 
+VISIBLE = models.Q(is_hidden=False)
+HIDDEN = models.Q(is_hidden=True)
+POPULAR = models.Q(score__gt=0)
+
+
+class ModeratedQuerySet(models.QuerySet):
+    def visible(self):
+        return self.filter(VISIBLE)
+
+    def hide(self):
+        """Мягко удалить: скрыть объекты, запомнив время скрытия."""
+        now = timezone.now()
+        return self.update(is_hidden=True, hidden_at=now, updated=now)
+
+
+class VisibleManager(models.Manager.from_queryset(ModeratedQuerySet)):
+    """Менеджер по умолчанию: только не скрытые модератором объекты."""
+
+    def get_queryset(self):
+        return super().get_queryset().visible()
+
 
 class Group(models.Model):
     title = models.CharField('Название группы', max_length=200,
@@ -47,9 +69,30 @@ class Post(CreatedModel):
         blank=True,
         null=True
     )
+    is_hidden = models.BooleanField('Скрыт', default=False)
+    hidden_at = models.DateTimeField('Дата скрытия', null=True, blank=True)
+    score = models.FloatField('Рейтинг', default=0)
+
+    objects = VisibleManager()
+    all_objects = ModeratedQuerySet.as_manager()
 
     class Meta:
         ordering = ('-created',)
+        # Ленты читают только видимые посты, поэтому индексы лент
+        # частичные и не растут от скрытых строк.
+        indexes = [
+            models.Index(fields=['-created'], condition=VISIBLE,
+                         name='post_visible_created_idx'),
+            models.Index(fields=['group', '-created'], condition=VISIBLE,
+                         name='post_group_created_idx'),
+            models.Index(fields=['author', '-created'], condition=VISIBLE,
+                         name='post_author_created_idx'),
+            models.Index(fields=['hidden_at'], condition=HIDDEN,
+                         name='post_hidden_at_idx'),
+            models.Index(fields=['-score', '-id'],
+                         condition=VISIBLE & POPULAR,
+                         name='post_popular_idx'),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -74,8 +117,19 @@ class Comment(CreatedModel):
         'Текст комментария',
         help_text='Введите текст комментария'
     )
+    is_hidden = models.BooleanField('Скрыт', default=False)
+    hidden_at = models.DateTimeField('Дата скрытия', null=True, blank=True)
+
+    objects = VisibleManager()
+    all_objects = ModeratedQuerySet.as_manager()
 
     class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created'], condition=VISIBLE,
+                         name='comment_visible_post_idx'),
+            models.Index(fields=['hidden_at'], condition=HIDDEN,
+                         name='comment_hidden_at_idx'),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -105,3 +159,196 @@ class Follow(models.Model):
         ]
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+
+
+class GroupStats(models.Model):
+    """Агрегаты группы для каталога групп.
+
+    Пересчитываются командой refresh_group_stats, а не на каждый запрос.
+    """
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    posts_count = models.PositiveIntegerField('Всего постов', default=0)
+    last_activity = models.DateTimeField(
+        'Последняя активность', null=True, blank=True
+    )
+    activity_24h = models.PositiveIntegerField(
+        'Постов и комментариев за сутки', default=0
+    )
+    refreshed = models.DateTimeField('Дата пересчёта')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-activity_24h'],
+                         name='group_stats_trending_idx'),
+        ]
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+    def __str__(self):
+        return str(self.group_id)
+
+
+class Notification(CreatedModel):
+    """Уведомление подписчика о новом посте автора.
+
+    При переносе поста в архив уведомление переводится с post на
+    archived_post.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Пост'
+    )
+    archived_post = models.ForeignKey(
+        'ArchivedPost',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Архивный пост'
+    )
+    is_read = models.BooleanField('Прочитано', default=False)
+    sent_at = models.DateTimeField('Дата отправки', null=True, blank=True)
+
+    class Meta:
+        ordering = ('-created', '-pk')
+        indexes = [
+            models.Index(fields=['user', '-created'],
+                         name='notification_user_idx'),
+            models.Index(fields=['user'], condition=models.Q(is_read=False),
+                         name='notification_unread_idx'),
+            models.Index(fields=['user'],
+                         condition=models.Q(sent_at__isnull=True),
+                         name='notification_unsent_idx'),
+        ]
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.target.pk}'
+
+    @property
+    def target(self):
+        """Пост уведомления, горячий или архивный."""
+        return self.post if self.post_id else self.archived_post
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый в архив (posts.archive). id не меняется."""
+    id = models.IntegerField(primary_key=True)
+    created = models.DateTimeField('Дата создания')
+    updated = models.DateTimeField('Дата изменения')
+    text = models.TextField('Текст поста')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = [
+            models.Index(fields=['-created'],
+                         name='archived_post_created_idx'),
+            models.Index(fields=['group', '-created'],
+                         name='archived_post_group_idx'),
+            models.Index(fields=['author', '-created'],
+                         name='archived_post_author_idx'),
+        ]
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    """Комментарий к архивному посту."""
+    id = models.IntegerField(primary_key=True)
+    created = models.DateTimeField('Дата создания')
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField('Текст комментария')
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return self.text[:20]
+
+
+class PostRevision(CreatedModel):
+    """Предыдущая версия текста поста.
+
+    Хранится не текст, а обратный diff от следующей версии
+    (см. posts.revisions). При переносе поста в архив ревизия
+    переводится с post на archived_post.
+    """
+    post = models.ForeignKey(
+        Post,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='Пост'
+    )
+    archived_post = models.ForeignKey(
+        ArchivedPost,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='Архивный пост'
+    )
+    diff = models.TextField('Изменения')
+
+    class Meta:
+        ordering = ('-created', '-pk')
+        verbose_name = 'Версия поста'
+        verbose_name_plural = 'Версии постов'
+
+    def __str__(self):
+        post_id = self.post_id or self.archived_post_id
+        return f'{post_id}: {self.created:%d.%m.%Y %H:%M}'
@@ -0,0 +1,191 @@
+"""Массовая модерация пачками для фоновых заданий core.jobs.
+
+Объекты обходятся пачками по возрастанию id, без выборки всех id
+сразу. Удаление и обновление идут прямыми DELETE/UPDATE без загрузки
+объектов и без сигналов на каждую строку. Кэши лент групп и рейтинги
+постов обновляются один раз на пачку, статистика групп — один раз
+в конце задания.
+"""
+import time
+
+from django.conf import settings
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+from . import directory, feeds, ranking
+from .models import Comment, Post
+
+
+def batches(ids, size=None):
+    """Разбить отсортированные id на пачки."""
+    size = size or settings.MODERATION_BATCH_SIZE
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def walk(queryset, size=None):
+    """Пачки id объектов queryset по возрастанию id.
+
+    Каждая пачка выбирается отдельным запросом от последнего id
+    предыдущей, поэтому объекты можно удалять и менять по ходу обхода.
+    """
+    size = size or settings.MODERATION_BATCH_SIZE
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        batch = list(page[:size])
+        if not batch:
+            return
+        yield batch
+        if len(batch) < size:
+            return
+        last = batch[-1]
+
+
+def raw_delete(model, ids):
+    """Удалить объекты и зависящие от них строки без Collector.
+
+    Связи CASCADE удаляются рекурсивно, SET_NULL обнуляются. Остальные
+    варианты on_delete (PROTECT, SET_DEFAULT, DO_NOTHING) без Collector
+    соблюсти нельзя, на них удаление отказывает. Зависимые строки
+    удаляются пачками по MODERATION_BATCH_SIZE.
+    """
+    if not ids:
+        return
+    for rel in model._meta.related_objects:
+        if rel.many_to_many:
+            continue
+        related = rel.related_model._base_manager.filter(
+            **{f'{rel.field.name}__in': ids}
+        )
+        if rel.on_delete is models.CASCADE:
+            for batch in walk(related):
+                raw_delete(rel.related_model, batch)
+        elif rel.on_delete is models.SET_NULL:
+            related.update(**{rel.field.name: None})
+        else:
+            raise ValueError(
+                f'{rel.related_model.__name__}.{rel.field.name}: '
+                f'on_delete={rel.on_delete.__name__} не поддерживается'
+            )
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} '
+            f'WHERE {quote(model._meta.pk.column)} IN ({placeholders})',
+            list(ids)
+        )
+
+
+def _post_groups(ids):
+    return set(
+        Post.all_objects.filter(pk__in=ids)
+        .values_list('group_id', flat=True).distinct()
+    )
+
+
+def purge_hidden(model, before, batch_size=None, pause=0):
+    """Физически удалить объекты, скрытые раньше before, пачками.
+
+    Возвращает число удалённых объектов.
+    """
+    hidden = model.all_objects.filter(is_hidden=True, hidden_at__lt=before)
+    size = batch_size or settings.MODERATION_BATCH_SIZE
+    purged = 0
+    while True:
+        batch = list(hidden.order_by('pk').values_list('pk', flat=True)[:size])
+        if not batch:
+            return purged
+        with transaction.atomic():
+            raw_delete(model, batch)
+        purged += len(batch)
+        if len(batch) < size:
+            return purged
+        time.sleep(pause)
+
+
+def _batch_done(job, batch, groups=()):
+    feeds.refresh_groups(*groups)
+    job.advance(len(batch))
+
+
+def _job_done(stats=True):
+    # Агрегаты считаются по всем постам и комментариям: раз на задание.
+    if stats:
+        directory.refresh_stats()
+
+
+def delete_posts(job, queryset, stats=True):
+    for batch in walk(queryset):
+        with transaction.atomic():
+            groups = _post_groups(batch)
+            raw_delete(Post, batch)
+        _batch_done(job, batch, groups)
+    _job_done(stats)
+
+
+def hide_posts(job, queryset, stats=True):
+    for batch in walk(queryset):
+        with transaction.atomic():
+            groups = _post_groups(batch)
+            Post.all_objects.filter(pk__in=batch).hide()
+        _batch_done(job, batch, groups)
+    _job_done(stats)
+
+
+def regroup_posts(job, queryset, group_id):
+    for batch in walk(queryset):
+        with transaction.atomic():
+            groups = _post_groups(batch)
+            Post.all_objects.filter(pk__in=batch).update(
+                group_id=group_id, updated=timezone.now()
+            )
+        _batch_done(job, batch, {group_id, *groups})
+    _job_done()
+
+
+def delete_comments(job, queryset, stats=True):
+    for batch in walk(queryset):
+        with transaction.atomic():
+            ranking.comments_removed(
+                Comment.all_objects.filter(pk__in=batch)
+            )
+            raw_delete(Comment, batch)
+        _batch_done(job, batch)
+    _job_done(stats)
+
+
+def hide_comments(job, queryset, stats=True):
+    for batch in walk(queryset):
+        with transaction.atomic():
+            comments = Comment.all_objects.filter(pk__in=batch)
+            ranking.comments_removed(comments)
+            comments.hide()
+        _batch_done(job, batch)
+    _job_done(stats)
+
+
+def _authored(user_ids):
+    comments = Comment.all_objects.filter(author_id__in=user_ids)
+    posts = Post.all_objects.filter(author_id__in=user_ids)
+    return comments, posts, comments.count() + posts.count()
+
+
+def delete_user_content(job, user_ids):
+    """Удалить все посты и комментарии пользователей."""
+    comments, posts, job.total = _authored(user_ids)
+    job.save(update_fields=['total'])
+    delete_comments(job, comments, stats=False)
+    delete_posts(job, posts)
+
+
+def hide_user_content(job, user_ids):
+    """Скрыть все посты и комментарии пользователей."""
+    comments, posts, job.total = _authored(user_ids)
+    job.save(update_fields=['total'])
+    hide_comments(job, comments, stats=False)
+    hide_posts(job, posts)
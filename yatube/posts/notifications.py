@@ -0,0 +1,110 @@
+"""Уведомления подписчиков о новых постах.
+
+Публикация поста запускает фоновое задание, которое пачками
+записывает строки Notification всем подписчикам автора. Письма не
+отправляются по одному: команда send_notification_digests собирает
+неотправленные уведомления в одно письмо на получателя и отправляет
+пачку писем через одно соединение EMAIL_BACKEND. Число непрочитанных
+уведомлений кэшируется для каждого пользователя.
+"""
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.jobs import run_job
+
+from .models import Follow, Notification
+from .moderation import batches
+
+UNREAD_KEY = 'notifications:unread:{}'
+
+
+def publish(post):
+    """Запустить рассылку уведомлений о новом посте."""
+    if Follow.objects.filter(author_id=post.author_id).exists():
+        run_job(f'Уведомления о посте #{post.pk}', fan_out, post.pk,
+                post.author_id)
+
+
+def fan_out(job, post_id, author_id):
+    followers = list(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+    )
+    job.total = len(followers)
+    job.save(update_fields=['total'])
+    for batch in batches(followers, settings.NOTIFICATION_BATCH_SIZE):
+        Notification.objects.bulk_create(
+            Notification(user_id=user_id, post_id=post_id)
+            for user_id in batch
+        )
+        cache.delete_many([UNREAD_KEY.format(pk) for pk in batch])
+        job.advance(len(batch))
+
+
+def unread_count(user):
+    return cache.get_or_set(
+        UNREAD_KEY.format(user.pk),
+        lambda: Notification.objects.filter(user=user, is_read=False)
+        .count(),
+        settings.NOTIFICATION_COUNT_TIMEOUT
+    )
+
+
+def mark_read(user, ids):
+    Notification.objects.filter(
+        user=user, pk__in=ids, is_read=False
+    ).update(is_read=True)
+    cache.delete(UNREAD_KEY.format(user.pk))
+
+
+def _digest(user, notifications):
+    body = render_to_string('posts/notifications_digest.txt', {
+        'user': user,
+        'notifications': notifications,
+        'site_url': settings.SITE_URL,
+    })
+    return EmailMessage(
+        f'Новые посты авторов, на которых вы подписаны: '
+        f'{len(notifications)}',
+        body,
+        to=[user.email]
+    )
+
+
+def send_digests(batch_size=None):
+    """Отправить дайджесты всех неотправленных уведомлений.
+
+    Возвращает число отправленных писем.
+    """
+    size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    unsent = Notification.objects.filter(sent_at__isnull=True)
+    sent = 0
+    with get_connection() as connection:
+        while True:
+            user_ids = list(
+                unsent.order_by('user_id')
+                .values_list('user_id', flat=True).distinct()[:size]
+            )
+            if not user_ids:
+                return sent
+            rows = list(
+                unsent.filter(user_id__in=user_ids)
+                .select_related('user', 'post__author',
+                                'archived_post__author')
+                .order_by('user_id', 'created')
+            )
+            messages = []
+            for user, group in groupby(rows, key=lambda row: row.user):
+                posts = [row for row in group
+                         if not (row.post and row.post.is_hidden)]
+                if posts and user.email:
+                    messages.append(_digest(user, posts))
+            sent += connection.send_messages(messages) or 0
+            Notification.objects.filter(
+                pk__in=[row.pk for row in rows]
+            ).update(sent_at=timezone.now())
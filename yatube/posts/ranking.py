@@ -0,0 +1,76 @@
+"""Рейтинг постов для ленты «Популярное».
+
+Рейтинг хранится в индексируемой колонке Post.score и меняется
+инкрементально: новый пост получает вес по числу подписчиков автора,
+каждый комментарий добавляет POPULAR_COMMENT_WEIGHT одним UPDATE, а
+скрытый или удалённый комментарий снимает его, но не ниже нуля.
+Команда decay_scores по расписанию умножает рейтинги на коэффициент
+затухания, поэтому старые обсуждения уступают место новым.
+"""
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import POPULAR, Post
+
+
+def initial_score(author):
+    """Стартовый рейтинг поста: логарифм числа подписчиков автора."""
+    followers = author.following.count()
+    return settings.POPULAR_FOLLOWER_WEIGHT * math.log1p(followers)
+
+
+def comment_added(post_id, count=1):
+    Post.all_objects.filter(pk=post_id).update(
+        score=F('score') + settings.POPULAR_COMMENT_WEIGHT * count
+    )
+
+
+def _lower(post_ids, count):
+    Post.all_objects.filter(pk__in=post_ids).update(score=Greatest(
+        F('score') - settings.POPULAR_COMMENT_WEIGHT * count, 0.0
+    ))
+
+
+def comment_removed(post_id):
+    _lower([post_id], 1)
+
+
+def comments_removed(comments):
+    """Снять с постов вес удаляемых или скрываемых комментариев.
+
+    Скрытые раньше комментарии уже не учитываются в рейтинге. Посты
+    с одинаковым числом снятых комментариев обновляются одним UPDATE.
+    """
+    by_count = defaultdict(list)
+    for row in (comments.filter(is_hidden=False).order_by()
+                .values('post').annotate(count=Count('pk'))):
+        by_count[row['count']].append(row['post'])
+    for count, post_ids in by_count.items():
+        _lower(post_ids, count)
+
+
+def decay_factor(hours):
+    """Множитель затухания за hours часов."""
+    return 0.5 ** (hours / settings.POPULAR_HALF_LIFE_HOURS)
+
+
+def decay(hours):
+    """Состарить рейтинги на hours часов.
+
+    Рейтинги меньше POPULAR_MIN_SCORE обнуляются, чтобы пост выпал из
+    частичного индекса. Возвращает число затронутых постов.
+    """
+    scored = Post.all_objects.filter(POPULAR)
+    count = scored.update(score=F('score') * decay_factor(hours))
+    scored.filter(score__lt=settings.POPULAR_MIN_SCORE).update(score=0)
+    return count
+
+
+def popular_posts():
+    return Post.objects.filter(POPULAR).select_related(
+        'author', 'group'
+    ).order_by('-score', '-id')
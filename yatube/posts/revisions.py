@@ -0,0 +1,52 @@
+"""История правок постов.
+
+Ревизия хранит обратный построчный diff: как из текста следующей версии
+получить предыдущую. Совпадающие куски записываются диапазоном строк
+[начало, конец] следующей версии, изменённые — строкой старого текста,
+поэтому правка одного абзаца в длинном посте занимает несколько байт.
+"""
+import difflib
+import json
+
+from .models import PostRevision
+
+
+def make_diff(new, old):
+    """Обратный diff: операции сборки old из строк new."""
+    new_lines = new.splitlines(keepends=True)
+    old_lines = old.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, new_lines, old_lines,
+                                      autojunk=False)
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j1 < j2:
+            ops.append(''.join(old_lines[j1:j2]))
+    return json.dumps(ops, ensure_ascii=False, separators=(',', ':'))
+
+
+def apply_diff(new, diff):
+    """Восстановить предыдущий текст по тексту new и diff."""
+    new_lines = new.splitlines(keepends=True)
+    return ''.join(
+        op if isinstance(op, str) else ''.join(new_lines[op[0]:op[1]])
+        for op in json.loads(diff)
+    )
+
+
+def record(post, old_text):
+    """Сохранить ревизию, если текст поста изменился."""
+    if post.text == old_text:
+        return None
+    return PostRevision.objects.create(
+        post=post, diff=make_diff(post.text, old_text)
+    )
+
+
+def history(post):
+    """Пары (ревизия, текст до неё) от новых правок к старым."""
+    text = post.text
+    for revision in post.revisions.all():
+        text = apply_diff(text, revision.diff)
+        yield revision, text
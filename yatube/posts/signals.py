@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import archive, ranking
+from .models import ArchivedPost, Comment, Post
+
+
+@receiver(pre_save, sender=Post)
+def score_new_post(sender, instance, raw=False, **kwargs):
+    """Задать стартовый рейтинг новому посту."""
+    if instance.pk is None and not raw:
+        instance.score = ranking.initial_score(instance.author)
+
+
+@receiver(post_save, sender=Comment)
+def score_comment(sender, instance, created, raw=False, **kwargs):
+    """Поднять рейтинг поста за новый комментарий."""
+    if created and not raw:
+        ranking.comment_added(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def unscore_comment(sender, instance, **kwargs):
+    """Снять вес удалённого комментария, если он ещё учитывался."""
+    if not instance.is_hidden:
+        ranking.comment_removed(instance.post_id)
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def archived_post_deleted(sender, instance, **kwargs):
+    """Сбросить кэш числа архивных постов (например, при удалении автора)."""
+    archive.bump_version()
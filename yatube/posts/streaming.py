@@ -0,0 +1,49 @@
+"""Потоковая отдача длинных страниц.
+
+Страница рендерится обычным шаблоном, в котором на месте списка
+постов стоит MARKER. Всё до метки отдаётся сразу, затем карточки
+постов пачками по EXPORT_CHUNK_SIZE, затем остаток страницы. Посты
+читаются через iterator(chunk_size=...), без кэша QuerySet, поэтому
+память не растёт с числом постов.
+"""
+from itertools import chain, islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+
+MARKER = '<!-- posts -->'
+
+
+def chunks(iterable, size):
+    """Разбить последовательность на списки по size элементов."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _posts(querysets, size):
+    return chain.from_iterable(
+        queryset.select_related('author', 'group').iterator(chunk_size=size)
+        for queryset in querysets
+    )
+
+
+def stream_posts(request, template_name, context, querysets):
+    """Потоковый ответ: шаблон страницы с постами из querysets по очереди."""
+    head, tail = render_to_string(
+        template_name, context, request
+    ).split(MARKER, 1)
+    size = settings.EXPORT_CHUNK_SIZE
+    cards = get_template('includes/post_chunk.html')
+
+    def content():
+        yield head
+        for chunk in chunks(_posts(querysets, size), size):
+            yield cards.render({'posts': chunk})
+        yield tail
+
+    return StreamingHttpResponse(content())
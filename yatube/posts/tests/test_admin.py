@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.paginator import EstimatedCountPaginator
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.group = Group.objects.create(
+            title='SomeGroup',
+            slug='1',
+            description='Тестовая группа'
+        )
+        posts = Post.objects.bulk_create(
+            Post(text=f'Текст {i}', author=cls.admin, group=cls.group)
+            for i in range(30)
+        )
+        Comment.objects.bulk_create(
+            Comment(text='Комментарий', author=cls.admin, post=post)
+            for post in Post.objects.all()[:len(posts)]
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Список постов и комментариев не делает запросов на строку"""
+        # Два первых запроса читают сессию и пользователя сессии.
+        queries = {'post': 8, 'comment': 7, 'follow': 5}
+        self.client.get(reverse('admin:index'))
+        for model, count in queries.items():
+            url = reverse(f'admin:posts_{model}_changelist')
+            with self.subTest(model=model):
+                with self.assertNumQueries(count):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=10)
+    def test_estimated_count(self):
+        """Без фильтров число строк берётся из статистики БД"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 30)
+        filtered = EstimatedCountPaginator(
+            Post.objects.filter(text='Текст 1'), 10
+        )
+        self.assertEqual(filtered.count, 1)
@@ -0,0 +1,150 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive, feeds, revisions
+from ..models import (ArchivedComment, ArchivedPost, Comment, Group,
+                      Notification, Post, PostRevision)
+
+User = get_user_model()
+
+
+@override_settings(GROUP_FEED_HOT_HITS=1)
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeName')
+        cls.group = Group.objects.create(
+            title='SomeGroup',
+            slug='1',
+            description='Тестовая группа'
+        )
+        old = timezone.now() - timedelta(days=400)
+        for i in range(settings.POSTS_ON_PAGE + 3):
+            post = Post.objects.create(
+                text=f'Старый пост {i}', author=cls.user, group=cls.group
+            )
+            Post.objects.filter(pk=post.pk).update(
+                created=old + timedelta(minutes=i)
+            )
+        Comment.objects.create(text='Старый комментарий',
+                               author=cls.user, post=post)
+        revisions.record(post, 'Первая версия')
+        cls.reader = User.objects.create_user(username='Reader')
+        Notification.objects.create(user=cls.reader, post=post)
+        cls.old_post = post
+        cls.new_posts = [
+            Post.objects.create(
+                text=f'Новый пост {i}', author=cls.user, group=cls.group
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        call_command('archive_posts', pause=0, stdout=StringIO())
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_old_posts_moved(self):
+        """Старые посты переносятся в архив вместе с комментариями"""
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(
+            ArchivedPost.objects.count(), settings.POSTS_ON_PAGE + 3
+        )
+        archived = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived.text, self.old_post.text)
+        self.assertEqual(archived.comments.get().text, 'Старый комментарий')
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ArchivedComment.objects.count(), 1)
+
+    def test_dependents_follow_post(self):
+        """Ревизии и уведомления переходят на архивный пост"""
+        archived = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(
+            [text for _, text in revisions.history(archived)],
+            ['Первая версия']
+        )
+        notification = Notification.objects.get()
+        self.assertEqual(notification.target, archived)
+        self.assertFalse(PostRevision.objects.filter(post__isnull=False)
+                         .exists())
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertContains(response, archived.text)
+
+    def test_follow_feed_count_cached(self):
+        """Число архивных постов ленты подписок кэшируется до подписки"""
+        self.client.force_login(self.reader)
+        url = reverse('posts:follow_index')
+        self.client.get(url)
+        # Архивная часть берётся из кэша, считается только горячая.
+        with self.assertNumQueries(1):
+            self.assertEqual(archive.follow_feed(self.reader).count(), 0)
+        self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.user})
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count,
+                         settings.POSTS_ON_PAGE + 6)
+
+    def test_count_reset_on_archived_delete(self):
+        """Удаление архивных постов сбрасывает кэш их числа"""
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        self.client.get(url)
+        ArchivedPost.objects.exclude(pk=self.old_post.pk).delete()
+        response = self.client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 4)
+
+    def test_feeds_continue_into_archive(self):
+        """Ленты продолжаются архивными постами после горячих"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.client.get(url).context['page_obj']
+                self.assertEqual(
+                    first.paginator.count, settings.POSTS_ON_PAGE + 6
+                )
+                self.assertEqual(first[0], self.new_posts[-1])
+                self.assertEqual(first[3].pk, self.old_post.pk)
+                last = self.client.get(url + '?page=2').context['page_obj']
+                self.assertEqual(len(last), 6)
+                self.assertIsInstance(last[0], ArchivedPost)
+
+    def test_group_state_counts_archive(self):
+        """Состояние горячей ленты группы учитывает архив"""
+        self.client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        )
+        state = feeds.get_state(self.group.pk)
+        self.assertEqual(state['hot_count'], 3)
+        self.assertEqual(state['count'], settings.POSTS_ON_PAGE + 6)
+
+    def test_archived_post_detail_read_only(self):
+        """Архивный пост открывается без формы комментария"""
+        self.client.force_login(self.user)
+        url = reverse('posts:post_detail',
+                      kwargs={'post_id': self.old_post.pk})
+        response = self.client.get(url)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, 'Старый комментарий')
+        self.assertNotContains(
+            response,
+            reverse('posts:add_comment', kwargs={'post_id': self.old_post.pk})
+        )
+        response = self.client.get(
+            reverse('posts:post_edit', kwargs={'post_id': self.old_post.pk})
+        )
+        self.assertEqual(response.status_code, 404)
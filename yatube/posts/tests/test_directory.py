@@ -0,0 +1,70 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeName')
+        cls.quiet = Group.objects.create(
+            title='А тихая', slug='quiet', description='Давно без постов'
+        )
+        cls.busy = Group.objects.create(
+            title='Б активная', slug='busy', description='Много постов'
+        )
+        cls.empty = Group.objects.create(
+            title='В пустая', slug='empty', description='Без постов'
+        )
+        old = timezone.now() - timedelta(days=3)
+        for i in range(3):
+            post = Post.objects.create(text=f'Старый {i}', author=cls.user,
+                                       group=cls.quiet)
+            Post.objects.filter(pk=post.pk).update(created=old)
+        post = Post.objects.create(text='Свежий', author=cls.user,
+                                   group=cls.busy)
+        Comment.objects.create(text='Ответ', author=cls.user, post=post)
+
+    def setUp(self):
+        call_command('refresh_group_stats', stdout=StringIO())
+        self.url = reverse('posts:group_index')
+
+    def test_stats_refreshed(self):
+        """Агрегаты групп пересчитываются одной командой"""
+        quiet = GroupStats.objects.get(group=self.quiet)
+        busy = GroupStats.objects.get(group=self.busy)
+        self.assertEqual((quiet.posts_count, quiet.activity_24h), (3, 0))
+        self.assertEqual((busy.posts_count, busy.activity_24h), (1, 2))
+        self.assertIsNone(GroupStats.objects.get(
+            group=self.empty).last_activity)
+        Post.objects.create(text='Ещё', author=self.user, group=self.busy)
+        call_command('refresh_group_stats', stdout=StringIO())
+        self.assertEqual(
+            GroupStats.objects.get(group=self.busy).posts_count, 2
+        )
+
+    def test_directory_sorts(self):
+        """Каталог сортируется по названию, числу постов и активности"""
+        expected = {
+            'title': [self.quiet, self.busy, self.empty],
+            'posts': [self.quiet, self.busy, self.empty],
+            'trending': [self.busy, self.quiet, self.empty],
+        }
+        for sort, groups in expected.items():
+            with self.subTest(sort=sort):
+                response = self.client.get(self.url, {'sort': sort})
+                self.assertEqual(list(response.context['page_obj']), groups)
+
+    def test_directory_queries(self):
+        """Страница каталога не агрегирует посты на запрос"""
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {'sort': 'trending'})
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import feeds
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(GROUP_FEED_HOT_HITS=1)
+class GroupFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeName')
+        cls.group = Group.objects.create(
+            title='SomeGroup',
+            slug='hot',
+            description='Горячая группа'
+        )
+        cls.other_group = Group.objects.create(
+            title='OtherGroup',
+            slug='other',
+            description='Другая группа'
+        )
+        cls.post = Post.objects.create(
+            text='Пост горячей группы',
+            author=cls.user,
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse('posts:group_list', kwargs={'slug': 'hot'})
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_group_becomes_hot(self):
+        """Группа с частыми запросами становится горячей"""
+        response = self.client.get(self.url)
+        self.assertIn(self.group.pk, feeds.hot_groups())
+        self.assertIsNotNone(response.context['feed_version'])
+        state = feeds.get_state(self.group.pk)
+        self.assertEqual(state['ids'], [self.post.pk])
+        self.assertEqual(state['count'], 1)
+
+    def test_hot_page_served_from_cache(self):
+        """Страница горячей группы отдаётся из кэша"""
+        self.client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Изменено в БД')
+        response = self.client.get(self.url)
+        self.assertContains(response, self.post.text)
+
+    def test_created_post_refreshes_feed(self):
+        """Новый пост через PostForm сразу попадает в ленту группы"""
+        self.client.get(self.url)
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Свежий пост', 'group': self.group.pk}
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Свежий пост')
+        self.assertEqual(feeds.get_state(self.group.pk)['count'], 2)
+
+    def test_moved_post_leaves_feed(self):
+        """Пост, перенесённый в другую группу, пропадает из ленты"""
+        self.client.get(self.url)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': self.post.text, 'group': self.other_group.pk}
+        )
+        response = self.client.get(self.url)
+        self.assertNotContains(response, self.post.text)
+        self.assertEqual(feeds.get_state(self.group.pk)['ids'], [])
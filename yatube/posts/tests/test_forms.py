@@ -77,6 +77,8 @@ class FormsTests(TestCase):
                 image='posts/small.gif'
             ).exists()
         )
+        # Миниатюры собраны при загрузке, лента сразу выводит srcset.
+        self.assertContains(response, '<picture>')
 
     def test_post_edit(self):
         """Изменения поста сохраняются в БД"""
@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import (ArchivedPost, Comment, Follow, Group, GroupStats,
+                      Post)
+
+User = get_user_model()
+
+
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='SomeGroup',
+            slug='old',
+            description='Тестовая группа'
+        )
+        Follow.objects.create(
+            user=User.objects.create_user(username='Reader'),
+            author=cls.author
+        )
+        cls.existing = Post.objects.create(text='Уже был', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def tearDown(self):
+        cache.clear()
+
+    def run_import(self, name, content, *args):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        out = StringIO()
+        call_command('import_posts', path, '--batch-size', '2', *args,
+                     stdout=out)
+        return out.getvalue()
+
+    def test_ndjson(self):
+        """Посты и комментарии импортируются с датами и связями"""
+        old = (timezone.now() - timedelta(days=30)).isoformat()
+        records = [
+            {'id': 'a', 'author': 'Author', 'group': 'old', 'text': 'Первый',
+             'created': old},
+            {'id': 'b', 'author': 'Author', 'group': 'new', 'text': 'Второй'},
+            {'type': 'comment', 'post': 'a', 'author': 'Author',
+             'text': 'Комментарий', 'created': old},
+            {'type': 'comment', 'post': 'b', 'author': 'Author',
+             'text': 'Свежий'},
+            {'id': 'c', 'author': 'Stranger', 'text': 'Чужой'},
+            {'type': 'comment', 'post': 'x', 'author': 'Author',
+             'text': 'Потерянный'},
+        ]
+        output = self.run_import(
+            'dump.ndjson', '\n'.join(json.dumps(r) for r in records)
+        )
+        self.assertIn('постов 2, комментариев 2', output)
+        self.assertIn('Пропущено (author): 1', output)
+        self.assertIn('Пропущено (post): 1', output)
+
+        first = Post.objects.get(text='Первый')
+        second = Post.objects.get(text='Второй')
+        self.assertGreater(first.pk, self.existing.pk)
+        self.assertEqual(first.created.isoformat(), old)
+        self.assertEqual(first.comments.get().text, 'Комментарий')
+        self.assertEqual(second.group.slug, 'new')
+        # Старый пост не попадает в популярное, свежий получает рейтинг.
+        self.assertEqual(first.score, 0)
+        self.assertGreater(second.score, 0)
+        self.assertEqual(GroupStats.objects.get(group=self.group).posts_count,
+                         1)
+        # Последовательность id продолжается после импорта.
+        post = Post.objects.create(text='После импорта', author=self.author)
+        comment = Comment.objects.create(text='После', author=self.author,
+                                         post=post)
+        self.assertGreater(post.pk, second.pk)
+        self.assertGreater(comment.pk, second.comments.get().pk)
+
+    def test_invalid_records_skipped(self):
+        """Битые строки и неверные даты пропускаются с номером записи"""
+        content = '\n'.join([
+            json.dumps({'author': 'Author', 'text': 'Первый'}),
+            '{"author": "Author", "text": ',
+            json.dumps({'author': 'Author', 'text': 'Дата',
+                        'created': '2020-13-45T10:00:00'}),
+            json.dumps(['не', 'объект']),
+            json.dumps({'author': 'Author', 'text': 'Метка',
+                        'created': 1577836800}),
+            json.dumps({'author': 'Author', 'text': 'Последний'}),
+        ])
+        output = self.run_import('dump.ndjson', content)
+        self.assertIn('постов 2', output)
+        self.assertIn('Пропущено (invalid): 4', output)
+        self.assertIn('запись 2:', output)
+        self.assertIn('запись 3:', output)
+        self.assertIn('запись 5:', output)
+        self.assertTrue(Post.objects.filter(text='Последний').exists())
+
+    def test_skipped_records_create_no_authors(self):
+        """Пропущенные записи не создают пользователей"""
+        records = [
+            {'author': 'Ghost', 'text': ''},
+            {'type': 'comment', 'post': 'x', 'author': 'Ghost',
+             'text': 'Потерянный'},
+            {'author': 'Ghost', 'text': 'Дата', 'created': 'вчера'},
+        ]
+        self.run_import('dump.ndjson',
+                        '\n'.join(json.dumps(r) for r in records),
+                        '--create-authors')
+        self.assertFalse(User.objects.filter(username='Ghost').exists())
+
+    def test_old_posts_archived(self):
+        """Посты старше срока архива сразу попадают в архив"""
+        old = (timezone.now() - timedelta(days=400)).isoformat()
+        records = [
+            {'id': 'a', 'author': 'Author', 'text': 'Древний',
+             'created': old},
+            {'type': 'comment', 'post': 'a', 'author': 'Author',
+             'text': 'Древний комментарий', 'created': old},
+        ]
+        output = self.run_import(
+            'dump.ndjson', '\n'.join(json.dumps(r) for r in records)
+        )
+        self.assertIn('Перенесено в архив: 1', output)
+        self.assertFalse(Post.objects.filter(text='Древний').exists())
+        archived = ArchivedPost.objects.get(text='Древний')
+        self.assertEqual(archived.created.isoformat(), old)
+        self.assertEqual(archived.comments.get().text, 'Древний комментарий')
+
+    def test_csv_create_authors(self):
+        """CSV с созданием неизвестных авторов"""
+        output = self.run_import(
+            'dump.csv',
+            'id,author,group,text\n1,Newcomer,,Из CSV\n',
+            '--create-authors'
+        )
+        self.assertIn('постов 1', output)
+        post = Post.objects.get(text='Из CSV')
+        self.assertEqual(post.author.username, 'Newcomer')
+        self.assertFalse(post.author.has_usable_password())
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import ingest
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class CommentIngestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeName')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse('posts:add_comment',
+                           kwargs={'post_id': self.post.pk})
+
+    def tearDown(self):
+        ingest.buffer.flush()
+        cache.clear()
+
+    def test_duplicate_suppressed(self):
+        """Повтор того же комментария не записывается"""
+        for text in ('Первый', 'первый ', 'Второй'):
+            self.authorized_client.post(self.url, data={'text': text})
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)),
+            ['Первый', 'Второй']
+        )
+
+    def test_rate_limited(self):
+        """Сверх лимита комментарий отклоняется с ошибкой формы"""
+        self.addCleanup(setattr, ingest, 'bucket', ingest.bucket)
+        ingest.bucket = ingest.TokenBucket('comment_test', 2, 60)
+        for i in range(2):
+            response = self.authorized_client.post(
+                self.url, data={'text': f'Комментарий {i}'}
+            )
+            self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.post(
+            self.url, data={'text': 'Лишний'}
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response.context['form'].non_field_errors())
+        self.assertEqual(Comment.objects.count(), 2)
+
+    @override_settings(COMMENT_BUFFER_SIZE=3, COMMENT_BUFFER_SECONDS=60)
+    def test_write_behind(self):
+        """Буфер пишет пачкой, а автор сразу видит свой комментарий"""
+        self.authorized_client.post(self.url, data={'text': 'В буфере'})
+        self.assertFalse(Comment.objects.exists())
+        detail = reverse('posts:post_detail',
+                         kwargs={'post_id': self.post.pk})
+        self.assertContains(self.authorized_client.get(detail), 'В буфере')
+        self.assertNotContains(self.client.get(detail), 'В буфере')
+        for text in ('Второй', 'Третий'):
+            self.authorized_client.post(self.url, data={'text': text})
+        self.assertEqual(Comment.objects.count(), 3)
+        self.assertEqual(
+            Post.objects.values_list('score', flat=True).get(
+                pk=self.post.pk
+            ),
+            3
+        )
+        response = self.authorized_client.get(detail)
+        self.assertEqual(len(response.context['comments']), 3)
+
+    @override_settings(COMMENT_BUFFER_SIZE=3, COMMENT_BUFFER_SECONDS=60)
+    def test_deleted_post_skipped(self):
+        """Комментарий к удалённому за время ожидания посту отбрасывается"""
+        other = Post.objects.create(text='Удалят', author=self.user)
+        self.authorized_client.post(self.url, data={'text': 'Живой'})
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': other.pk}),
+            data={'text': 'К удалённому'}
+        )
+        other.delete()
+        self.assertEqual(ingest.buffer.flush(), 1)
+        self.assertEqual(Comment.objects.get().text, 'Живой')
+        self.assertEqual(ingest.pending(self.user, other.pk), [])
+
+    @override_settings(COMMENT_BUFFER_SIZE=3, COMMENT_BUFFER_SECONDS=60)
+    def test_failed_batch_requeued(self):
+        """Пачка, которую не удалось записать, остаётся в буфере"""
+        self.authorized_client.post(self.url, data={'text': 'Повторить'})
+        with mock.patch.object(Comment.objects, 'bulk_create',
+                               side_effect=DatabaseError), \
+                self.assertLogs('posts.ingest', 'ERROR'):
+            self.assertEqual(ingest.buffer.flush(), 0)
+        self.assertEqual(len(ingest.buffer.items), 1)
+        self.assertEqual(ingest.buffer.flush(), 1)
+        self.assertEqual(Comment.objects.get().text, 'Повторить')
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default, get_thumbnail
+
+from ..models import Post
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class MediaGCTests(TestCase):
+    def setUp(self):
+        # Своя папка на тест: файлы чужих тестов для сборщика — мусор.
+        self.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        # sorl держит записи KV и в кэше, а не только в откатываемой БД.
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='SomeName')
+        self.kept, self.dropped = [
+            Post.objects.create(
+                text=name, author=self.user,
+                image=SimpleUploadedFile(name=name, content=SMALL_GIF,
+                                         content_type='image/gif')
+            )
+            for name in ('kept.gif', 'dropped.gif')
+        ]
+        self.thumbnails = {
+            post.pk: get_thumbnail(post.image, '960x339', crop='center')
+            for post in (self.kept, self.dropped)
+        }
+        Post.objects.filter(pk=self.dropped.pk).delete()
+
+    def path(self, name):
+        return os.path.join(self.media_root, name)
+
+    def test_orphans_removed(self):
+        """Удаляются только картинки без постов и их миниатюры"""
+        out = StringIO()
+        call_command('media_gc', min_age=0, stdout=out)
+        self.assertIn('оригиналов 1', out.getvalue())
+        self.assertTrue(os.path.exists(self.path(self.kept.image.name)))
+        self.assertTrue(os.path.exists(
+            self.path(self.thumbnails[self.kept.pk].name)
+        ))
+        self.assertFalse(os.path.exists(self.path(self.dropped.image.name)))
+        self.assertFalse(os.path.exists(
+            self.path(self.thumbnails[self.dropped.pk].name)
+        ))
+        self.assertIsNone(
+            default.kvstore.get(self.thumbnails[self.dropped.pk])
+        )
+        self.assertIsNotNone(
+            default.kvstore.get(self.thumbnails[self.kept.pk])
+        )
+
+    def test_dry_run_and_min_age(self):
+        """Пробный запуск и свежие файлы ничего не удаляют"""
+        call_command('media_gc', stdout=StringIO())
+        call_command('media_gc', min_age=0, dry_run=True, stdout=StringIO())
+        self.assertTrue(os.path.exists(self.path(self.dropped.image.name)))
+
+    def test_unsupported_sorl_version(self):
+        """С непроверенной версией sorl ничего не удаляется"""
+        with mock.patch('sorl.__version__', '13.0'):
+            with self.assertRaises(CommandError):
+                call_command('media_gc', min_age=0, stdout=StringIO())
+        self.assertTrue(os.path.exists(self.path(self.dropped.image.name)))
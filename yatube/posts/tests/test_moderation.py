@@ -0,0 +1,161 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import models
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import BackgroundJob
+
+from ..models import Comment, Group, GroupStats, Post
+from ..moderation import raw_delete
+
+User = get_user_model()
+
+
+@override_settings(BACKGROUND_JOBS_SYNC=True, MODERATION_BATCH_SIZE=2)
+class ModerationActionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.spammer = User.objects.create_user(username='Spammer')
+        cls.group = Group.objects.create(
+            title='SomeGroup',
+            slug='1',
+            description='Тестовая группа'
+        )
+        cls.new_group = Group.objects.create(
+            title='NewGroup',
+            slug='2',
+            description='Новая группа'
+        )
+        for i in range(5):
+            post = Post.objects.create(
+                text=f'Спам {i}', author=cls.spammer, group=cls.group
+            )
+            Comment.objects.create(
+                text='Спам', author=cls.spammer, post=post
+            )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def run_action(self, model, action, ids, **data):
+        return self.client.post(
+            reverse(f'admin:{model}_changelist'),
+            {'action': action, '_selected_action': ids, **data},
+            follow=True
+        )
+
+    def test_delete_posts_in_background(self):
+        """Посты удаляются пачками вместе с комментариями"""
+        ids = list(Post.objects.values_list('pk', flat=True))
+        response = self.run_action(
+            'posts_post', 'delete_in_background', ids
+        )
+        self.assertContains(response, 'Запущено задание')
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.status, BackgroundJob.DONE)
+        self.assertEqual((job.processed, job.total), (5, 5))
+        self.assertFalse(Post.all_objects.exists())
+        self.assertFalse(Comment.all_objects.exists())
+
+    def test_hide_posts_in_background(self):
+        """Скрытые посты пропадают из лент, но остаются в БД"""
+        ids = list(Post.objects.values_list('pk', flat=True))[:3]
+        self.run_action('posts_post', 'hide_in_background', ids)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Post.all_objects.count(), 5)
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': '1'})
+        )
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_regroup_posts_in_background(self):
+        """Посты переносятся в выбранную группу"""
+        ids = list(Post.objects.values_list('pk', flat=True))
+        self.run_action('posts_post', 'regroup_in_background', ids,
+                        group=self.new_group.pk)
+        self.assertEqual(self.new_group.posts.count(), 5)
+
+    def test_user_content_in_background(self):
+        """Действие над пользователем удаляет его посты и комментарии"""
+        self.run_action('auth_user', 'delete_content_in_background',
+                        [self.spammer.pk])
+        job = BackgroundJob.objects.get()
+        self.assertEqual((job.processed, job.total), (10, 10))
+        self.assertFalse(Post.all_objects.filter(author=self.spammer).exists())
+        self.assertTrue(User.objects.filter(pk=self.spammer.pk).exists())
+
+    def test_stats_and_scores_refreshed(self):
+        """Статистика групп и рейтинги постов обновляются по пачкам"""
+        post = Post.objects.first()
+        score = post.score
+        ids = list(Comment.objects.filter(post=post)
+                   .values_list('pk', flat=True))
+        self.run_action('posts_comment', 'delete_in_background', ids)
+        post.refresh_from_db()
+        self.assertLess(post.score, score)
+        self.run_action('posts_post', 'hide_in_background', [post.pk])
+        self.assertEqual(GroupStats.objects.get(group=self.group).posts_count,
+                         4)
+
+    def actions(self, model):
+        response = self.client.get(reverse(f'admin:{model}_changelist'))
+        return dict(response.context['action_form'].fields['action'].choices)
+
+    def test_delete_selected_disabled(self):
+        """Удаление выбранных выключено только у модерируемых моделей"""
+        for model in ('auth_user', 'posts_post', 'posts_comment'):
+            with self.subTest(model=model):
+                self.assertNotIn('delete_selected', self.actions(model))
+        self.assertIn('delete_selected', self.actions('posts_group'))
+
+    def test_stats_refreshed_once_per_job(self):
+        """Статистика групп считается один раз на задание, а не на пачку"""
+        with mock.patch('posts.directory.refresh_stats') as refresh:
+            self.run_action('auth_user', 'delete_content_in_background',
+                            [self.spammer.pk])
+        refresh.assert_called_once_with()
+        self.assertFalse(Post.all_objects.exists())
+
+    def test_raw_delete_unsupported_on_delete(self):
+        """raw_delete отказывает на связях, которые не умеет соблюсти"""
+        rel = Post._meta.get_field('comments')
+        self.addCleanup(setattr, rel, 'on_delete', rel.on_delete)
+        rel.on_delete = models.PROTECT
+        with self.assertRaises(ValueError):
+            raw_delete(Post, [Post.objects.first().pk])
+        self.assertEqual(Post.all_objects.count(), 5)
+
+
+class PurgeHiddenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeName')
+        cls.posts = [
+            Post.objects.create(text=f'Текст {i}', author=cls.user)
+            for i in range(5)
+        ]
+        Comment.objects.create(text='Комментарий', author=cls.user,
+                               post=cls.posts[0])
+
+    def test_purge_only_old_hidden(self):
+        """Удаляются только давно скрытые объекты"""
+        old, recent = self.posts[:3], self.posts[3:4]
+        Post.objects.filter(pk__in=[post.pk for post in old]).hide()
+        Post.all_objects.filter(pk__in=[post.pk for post in old]).update(
+            hidden_at=timezone.now() - timedelta(days=40)
+        )
+        Post.objects.filter(pk=recent[0].pk).hide()
+        call_command('purge_hidden', days=30, batch_size=2, pause=0,
+                     stdout=StringIO())
+        self.assertEqual(Post.all_objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(Comment.all_objects.exists())
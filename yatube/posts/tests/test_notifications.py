@@ -0,0 +1,81 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import notifications
+from ..models import Follow, Notification
+
+User = get_user_model()
+
+
+@override_settings(BACKGROUND_JOBS_SYNC=True, NOTIFICATION_BATCH_SIZE=2)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.followers = [
+            User.objects.create_user(username=f'Reader{i}',
+                                     email=f'reader{i}@example.com')
+            for i in range(3)
+        ]
+        for follower in cls.followers:
+            Follow.objects.create(user=follower, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.followers[0])
+
+    def tearDown(self):
+        cache.clear()
+
+    def publish(self, *texts):
+        for text in texts:
+            self.author_client.post(reverse('posts:post_create'),
+                                    data={'text': text})
+
+    def test_rows_for_followers(self):
+        """Новый пост создаёт уведомление каждому подписчику"""
+        self.publish('Новый пост')
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(notifications.unread_count(self.followers[0]), 1)
+
+    def test_unread_count_cached(self):
+        """Счётчик непрочитанных сбрасывается при новых уведомлениях"""
+        response = self.reader_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'badge-danger')
+        self.publish('Новый пост')
+        response = self.reader_client.get(reverse('posts:index'))
+        self.assertContains(response, 'badge-danger')
+        self.reader_client.get(reverse('posts:notifications'))
+        self.assertEqual(notifications.unread_count(self.followers[0]), 0)
+
+    def test_unread_count_once_per_render(self):
+        """Счётчик в шапке считается один раз за страницу"""
+        self.publish('Новый пост')
+        with mock.patch('core.context_processors.notifications.unread_count',
+                        return_value=1) as unread_count:
+            response = self.reader_client.get(reverse('posts:index'))
+        self.assertContains(response, 'badge-danger')
+        unread_count.assert_called_once_with(self.followers[0])
+
+    def test_digests(self):
+        """Уведомления уходят одним письмом на подписчика"""
+        self.publish('Первый пост', 'Второй пост')
+        call_command('send_notification_digests', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('Первый пост', mail.outbox[0].body)
+        self.assertIn('Второй пост', mail.outbox[0].body)
+        self.assertFalse(
+            Notification.objects.filter(sent_at__isnull=True).exists()
+        )
+        call_command('send_notification_digests', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 3)
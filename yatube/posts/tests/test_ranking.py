@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(POPULAR_HALF_LIFE_HOURS=1, POPULAR_MIN_SCORE=0.5)
+class RankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.quiet = Post.objects.create(text='Тихий пост', author=cls.reader)
+        cls.post = Post.objects.create(text='Обсуждаемый', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def score(self, post):
+        return Post.objects.values_list('score', flat=True).get(pk=post.pk)
+
+    def test_initial_score_from_followers(self):
+        """Пост автора с подписчиками получает стартовый рейтинг"""
+        self.assertEqual(self.score(self.quiet), 0)
+        self.assertGreater(self.score(self.post), 0)
+
+    def test_comment_raises_score(self):
+        """Комментарий поднимает рейтинг поста"""
+        before = self.score(self.quiet)
+        Comment.objects.create(text='Ответ', author=self.author,
+                               post=self.quiet)
+        self.assertEqual(self.score(self.quiet), before + 1)
+
+    @override_settings(BACKGROUND_JOBS_SYNC=True)
+    def test_removed_comment_lowers_score(self):
+        """Скрытие и удаление комментария снимают его вес с рейтинга"""
+        before = self.score(self.quiet)
+        comments = [
+            Comment.objects.create(text=f'Ответ {i}', author=self.author,
+                                   post=self.quiet)
+            for i in range(2)
+        ]
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        self.client.post(
+            reverse('admin:posts_comment_changelist'),
+            {'action': 'hide_in_background',
+             '_selected_action': [comments[0].pk]}
+        )
+        self.assertEqual(self.score(self.quiet), before + 1)
+        comments[1].delete()
+        self.assertEqual(self.score(self.quiet), before)
+        # Удаление уже скрытого комментария рейтинг не трогает.
+        Comment.all_objects.get(pk=comments[0].pk).delete()
+        self.assertEqual(self.score(self.quiet), before)
+
+    def test_decay(self):
+        """Рейтинг затухает вдвое за период, малый рейтинг обнуляется"""
+        Post.objects.filter(pk=self.post.pk).update(score=4)
+        Post.objects.filter(pk=self.quiet.pk).update(score=0.8)
+        call_command('decay_scores', hours=1, stdout=StringIO())
+        self.assertEqual(self.score(self.post), 2)
+        self.assertEqual(self.score(self.quiet), 0)
+
+    def test_popular_feed(self):
+        """Лента «Популярное» упорядочена по рейтингу"""
+        for _ in range(3):
+            Comment.objects.create(text='Ответ', author=self.author,
+                                   post=self.quiet)
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.quiet, self.post])
@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import ingest, notifications, revisions
+from ..models import Notification, Post
+
+User = get_user_model()
+
+
+class RevisionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeName')
+        cls.post = Post.objects.create(
+            text='Первая строка\nВторая строка\nТретья строка',
+            author=cls.user
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.edit_url = reverse('posts:post_edit',
+                                kwargs={'post_id': self.post.pk})
+        self.detail_url = reverse('posts:post_detail',
+                                  kwargs={'post_id': self.post.pk})
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_diff_round_trip(self):
+        """Из нового текста и diff восстанавливается старый"""
+        old = 'a\nb\nc\nd\n'
+        new = 'a\nB\nc\nd\ne'
+        diff = revisions.make_diff(new, old)
+        self.assertEqual(revisions.apply_diff(new, diff), old)
+        self.assertEqual(revisions.apply_diff(old, revisions.make_diff(
+            old, '')), '')
+
+    def test_edit_records_history(self):
+        """Правка поста сохраняет предыдущие версии текста"""
+        texts = [self.post.text]
+        for text in ('Первая строка\nНовая вторая\nТретья строка',
+                     'Совсем другой текст'):
+            self.authorized_client.post(self.edit_url, data={'text': text})
+            texts.append(text)
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.text, texts[-1])
+        self.assertEqual(
+            [text for revision, text in revisions.history(post)],
+            texts[-2::-1]
+        )
+        self.assertGreater(post.updated, self.post.updated)
+
+    def test_unchanged_text_no_revision(self):
+        """Сохранение без изменения текста не создаёт ревизию"""
+        self.authorized_client.post(self.edit_url,
+                                    data={'text': self.post.text})
+        self.assertFalse(self.post.revisions.exists())
+
+    def test_post_detail_etag(self):
+        """Страница поста отвечает 304, пока пост не изменился"""
+        etag = self.client.get(self.detail_url)['ETag']
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.authorized_client.post(self.edit_url, data={'text': 'Изменён'})
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_follows_sidebar(self):
+        """ETag меняется с именем автора и числом его постов"""
+        etag = self.client.get(self.detail_url)['ETag']
+        self.user.first_name = 'Новое'
+        self.user.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Новое')
+        etag = response['ETag']
+        Post.objects.create(text='Второй пост', author=self.user)
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_follows_csrf_token(self):
+        """После нового входа форма не отдаётся со старым CSRF-токеном"""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        etag = client.get(self.detail_url)['ETag']
+        client.logout()
+        client.force_login(self.user)
+        response = client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_card_cache_follows_updated(self):
+        """Кэш карточки поста сбрасывается правкой поста"""
+        profile_url = reverse('posts:profile', kwargs={'username': self.user})
+        self.client.get(profile_url)
+        self.authorized_client.post(self.edit_url, data={'text': 'Изменён'})
+        response = self.client.get(profile_url)
+        self.assertContains(response, 'Изменён')
+
+    @override_settings(COMMENT_BUFFER_SIZE=10, COMMENT_BUFFER_SECONDS=60)
+    def test_etag_follows_viewer_state(self):
+        """ETag меняется с отложенным комментарием и новым уведомлением"""
+        etag = self.authorized_client.get(self.detail_url)['ETag']
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Ещё в буфере'}
+        )
+        self.addCleanup(ingest.buffer.flush)
+        response = self.authorized_client.get(self.detail_url,
+                                              HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Ещё в буфере')
+        etag = response['ETag']
+        Notification.objects.create(user=self.user, post=self.post)
+        cache.delete(notifications.UNREAD_KEY.format(self.user.pk))
+        response = self.authorized_client.get(self.detail_url,
+                                              HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_card_cache_follows_author(self):
+        """Кэш карточки поста сбрасывается сменой имени автора"""
+        template = Template('{% load feed_tags %}{% post_card post %}')
+        template.render(Context({'post': self.post}))
+        self.user.first_name = 'Новое'
+        self.user.last_name = 'Имя'
+        self.user.save()
+        post = Post.objects.select_related('author').get(pk=self.post.pk)
+        self.assertIn('Новое Имя', template.render(Context({'post': post})))
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post
+from ..streaming import chunks
+
+User = get_user_model()
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class StreamingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeName')
+        cls.group = Group.objects.create(
+            title='SomeGroup',
+            slug='1',
+            description='Тестовая группа'
+        )
+        old = timezone.now() - timedelta(days=400)
+        post = Post.objects.create(
+            text='Старый пост', author=cls.user, group=cls.group
+        )
+        Post.objects.filter(pk=post.pk).update(created=old)
+        for i in range(4):
+            Post.objects.create(
+                text=f'Новый пост {i}', author=cls.user, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        call_command('archive_posts', pause=0, stdout=StringIO())
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def read(self, url):
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        return [part.decode() for part in response.streaming_content]
+
+    def test_export_pages(self):
+        """Выгрузка отдаёт шапку, посты пачками и архив в конце"""
+        urls = (
+            reverse('posts:profile_export', args=[self.user.username]),
+            reverse('posts:group_export', args=[self.group.slug]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                parts = self.read(url)
+                # Шапка, три пачки по два поста и подвал.
+                self.assertEqual(len(parts), 5)
+                self.assertIn('<h1>', parts[0])
+                self.assertNotIn('Новый пост', parts[0])
+                self.assertIn('</html>', parts[-1])
+                page = ''.join(parts)
+                self.assertLess(page.index('Новый пост 0'),
+                                page.index('Старый пост'))
+                self.assertEqual(page.count('подробная информация'), 5)
+
+    def test_export_not_found(self):
+        """Выгрузка несуществующего автора отдаёт 404"""
+        response = self.client.get(
+            reverse('posts:profile_export', args=['nobody'])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_login_required(self):
+        """Аноним перенаправляется на страницу входа"""
+        self.client.logout()
+        url = reverse('posts:group_export', args=[self.group.slug])
+        self.assertRedirects(self.client.get(url),
+                             f'{reverse("users:login")}?next={url}')
+
+    def test_chunks(self):
+        self.assertEqual(list(chunks(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(chunks([], 2)), [])
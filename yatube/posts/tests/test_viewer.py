@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class ViewerStateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.followed = User.objects.create_user(username='Followed')
+        cls.other = User.objects.create_user(username='Other')
+        Follow.objects.create(user=cls.reader, author=cls.followed)
+        cls.followed_post = Post.objects.create(
+            text='Пост любимого автора', author=cls.followed
+        )
+        cls.other_posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.other)
+            for i in range(5)
+        ]
+        Comment.objects.create(text='Ответ', author=cls.reader,
+                               post=cls.other_posts[0])
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_feed_annotated(self):
+        """Посты ленты знают о подписке и комментариях зрителя"""
+        response = self.authorized_client.get(reverse('posts:index'))
+        states = {
+            post.pk: (post.viewer_follows, post.viewer_commented)
+            for post in response.context['page_obj']
+        }
+        self.assertEqual(states[self.followed_post.pk], (True, False))
+        self.assertEqual(states[self.other_posts[0].pk], (False, True))
+        self.assertEqual(states[self.other_posts[1].pk], (False, False))
+        self.assertContains(
+            response,
+            reverse('posts:profile_unfollow', args=[self.followed.username])
+        )
+
+    def page_queries(self, url):
+        self.authorized_client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        return queries
+
+    def test_no_query_per_card(self):
+        """Состояние зрителя не добавляет запросов на карточку"""
+        url = reverse('posts:profile', args=[self.other.username])
+        queries = self.page_queries(url)
+        Post.objects.bulk_create(
+            Post(text=f'Ещё пост {i}', author=self.other)
+            for i in range(len(self.other_posts))
+        )
+        self.assertEqual(len(self.page_queries(url)), len(queries))
+
+    def test_viewer_state_not_frozen(self):
+        """Подписка сразу видна в ленте с закэшированными карточками"""
+        url = reverse('posts:index')
+        unfollow = reverse('posts:profile_unfollow',
+                           args=[self.other.username])
+        self.assertNotContains(self.authorized_client.get(url), unfollow)
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=[self.other.username])
+        )
+        self.assertContains(self.authorized_client.get(url), unfollow)
+
+    def test_anonymous_feed_plain(self):
+        """Для анонима ленты не аннотируются"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(
+            hasattr(response.context['page_obj'][0], 'viewer_follows')
+        )
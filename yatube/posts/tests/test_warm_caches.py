@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import feeds
+from ..models import Group, Post
+from ..warmup import feed_urls, image_names
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WarmCachesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='SomeName')
+        cls.group = Group.objects.create(
+            title='SomeGroup',
+            slug='1',
+            description='Тестовая группа'
+        )
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.post = Post.objects.create(
+            text='Прогретый пост',
+            author=cls.user,
+            group=cls.group,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=small_gif,
+                content_type='image/gif'
+            )
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_feed_urls(self):
+        """Прогреваются главная, популярное, группа и профиль автора"""
+        urls = feed_urls(pages=1, groups=5, profiles=5)
+        self.assertEqual(urls, [
+            reverse('posts:index') + '?page=1',
+            reverse('posts:popular') + '?page=1',
+            reverse('posts:group_list', kwargs={'slug': '1'}) + '?page=1',
+            reverse('posts:profile', kwargs={'username': 'SomeName'})
+            + '?page=1',
+        ])
+        self.assertEqual(image_names(1, 5, 5), [self.post.image.name])
+
+    def test_warm_caches_fills_index_fragment(self):
+        """После прогрева главная страница отдаётся из кэша"""
+        out = StringIO()
+        call_command('warm_caches', workers=1, stdout=out)
+        self.assertIn('Прогрето задач', out.getvalue())
+        Post.objects.filter(pk=self.post.pk).delete()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Прогретый пост')
+
+    @override_settings(GROUP_FEED_HOT_HITS=1)
+    def test_warm_caches_does_not_count_hits(self):
+        """Прогрев не делает группы горячими"""
+        call_command('warm_caches', workers=1, stdout=StringIO())
+        self.assertEqual(feeds.hot_groups(), {})
+        self.assertIsNone(cache.get(feeds.HITS_KEY.format(self.group.pk)))
@@ -1,10 +1,31 @@
 from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import Paginator
 
 
-def paginator(posts_list, request):
-    """Пагинация страниц"""
+def paginator(posts_list, request, count=None):
+    """Пагинация страниц.
+
+    Заранее известное число объектов (count) избавляет от запроса COUNT.
+    """
     pag = Paginator(posts_list, settings.POSTS_ON_PAGE)
+    if count is not None:
+        pag.count = count
     page_number = request.GET.get('page')
     page_obj = pag.get_page(page_number)
     return page_obj
+
+
+def cached_page(page_obj, key, timeout):
+    """Взять посты страницы из общего кэша или положить их туда.
+
+    Ключ строится только из данных ленты, поэтому запись одна на всех
+    зрителей; их состояние добавляет posts.viewer.
+    """
+    key = f'{key}:{page_obj.number}'
+    posts = cache.get(key)
+    if posts is None:
+        posts = list(page_obj.object_list)
+        cache.set(key, posts, timeout)
+    page_obj.object_list = posts
+    return page_obj
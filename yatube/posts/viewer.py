@@ -0,0 +1,31 @@
+"""Состояние ленты с точки зрения зрителя.
+
+Подписан ли зритель на автора и комментировал ли он пост, считается
+для всей страницы ленты парой запросов уже после её выборки, а не
+запросом на каждую карточку. Поэтому сами посты страницы не зависят
+от зрителя и берутся из общего кэша (posts.utils.cached_page).
+"""
+from .models import ArchivedComment, ArchivedPost, Comment, Follow
+
+
+def attach(page_obj, user):
+    """Добавить к постам страницы viewer_follows и viewer_commented."""
+    posts = list(page_obj.object_list)
+    page_obj.object_list = posts
+    if not user.is_authenticated or not posts:
+        return page_obj
+    follows = set(Follow.objects.filter(
+        user=user, author_id__in={post.author_id for post in posts}
+    ).values_list('author_id', flat=True))
+    commented = set()
+    for comment_model, archived in ((Comment, False), (ArchivedComment, True)):
+        ids = [post.pk for post in posts
+               if isinstance(post, ArchivedPost) == archived]
+        if ids:
+            commented.update(comment_model.objects.filter(
+                author=user, post_id__in=ids
+            ).values_list('post_id', flat=True))
+    for post in posts:
+        post.viewer_follows = post.author_id in follows
+        post.viewer_commented = post.pk in commented
+    return page_obj
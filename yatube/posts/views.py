@@ -1,38 +1,73 @@
+import hashlib
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import Count, Max, Q
 from django.http import HttpRequest, HttpResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.http import condition
+
+from core import images
 
+from . import (archive, directory, feeds, ingest, notifications, ranking,
+               revisions, streaming, viewer)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
-from .utils import paginator
+from .models import ArchivedPost, Follow, Group, Post
+from .utils import cached_page, paginator
 
 User = get_user_model()
 
 
 def index(request: HttpRequest) -> HttpResponse:
     """Вернуть главную страницу"""
-    posts = Post.objects.select_related()
-    page_obj = paginator(posts, request)
+    page_obj = cached_page(
+        paginator(archive.index_feed(), request), 'index_page', 20
+    )
+    viewer.attach(page_obj, request.user)
     return render(request, 'posts/index.html', {'page_obj': page_obj})
 
 
+def popular(request: HttpRequest) -> HttpResponse:
+    """Вернуть посты с наибольшим рейтингом"""
+    page_obj = cached_page(
+        paginator(ranking.popular_posts(), request), 'popular_page', 20
+    )
+    viewer.attach(page_obj, request.user)
+    return render(request, 'posts/popular.html', {'page_obj': page_obj})
+
+
+def group_index(request: HttpRequest) -> HttpResponse:
+    """Вернуть каталог групп"""
+    sort = request.GET.get('sort')
+    if sort not in directory.SORTS:
+        sort = 'title'
+    context = {
+        'page_obj': paginator(directory.groups(sort), request),
+        'sort': sort,
+        'sorts': (('title', 'По названию'), ('posts', 'По числу постов'),
+                  ('trending', 'Популярные сейчас')),
+        'page_query': f'sort={sort}&',
+    }
+    return render(request, 'posts/groups.html', context)
+
+
 def group_posts(request: HttpRequest, slug) -> HttpResponse:
     """Вернуть посты группы"""
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related()
-    page_obj = paginator(posts, request)
-    return render(
-        request,
-        'posts/group_list.html',
-        {'group': group, 'page_obj': page_obj}
-    )
+    context = feeds.group_page(group, request)
+    viewer.attach(context['page_obj'], request.user)
+    context['group'] = group
+    return render(request, 'posts/group_list.html', context)
 
 
 def profile(request: HttpRequest, username: str) -> HttpResponse:
     author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related()
-    page_obj = paginator(posts, request)
+    page_obj = viewer.attach(
+        paginator(archive.profile_feed(author), request), request.user
+    )
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user,
         author=author).exists()
@@ -44,11 +79,86 @@ def profile(request: HttpRequest, username: str) -> HttpResponse:
     return render(request, 'posts/profile.html', context)
 
 
+@login_required()
+def group_export(request: HttpRequest, slug) -> HttpResponse:
+    """Вернуть все посты группы, включая архив, одной потоковой страницей"""
+    group = get_object_or_404(Group, slug=slug)
+    context = {
+        'title': f'Все записи сообщества {group.title}',
+        'back_url': reverse('posts:group_list', args=[group.slug]),
+    }
+    return streaming.stream_posts(
+        request, 'posts/export.html', context,
+        (group.posts.all(), group.archived_posts.all())
+    )
+
+
+@login_required()
+def profile_export(request: HttpRequest, username: str) -> HttpResponse:
+    """Вернуть всю историю постов автора одной потоковой страницей"""
+    author = get_object_or_404(User, username=username)
+    context = {
+        'title': f'Все посты пользователя {author.get_full_name()}',
+        'back_url': reverse('posts:profile', args=[author.username]),
+    }
+    return streaming.stream_posts(
+        request, 'posts/export.html', context,
+        (author.posts.all(), author.archived_posts.all())
+    )
+
+
+POST_ETAG_FIELDS = (
+    'updated', 'author_id', 'author__username', 'author__first_name',
+    'author__last_name', 'group__title', 'group__slug'
+)
+
+
+def post_etag(request: HttpRequest, post_id: int):
+    """ETag страницы поста из всего, что она показывает.
+
+    Кроме дат изменения поста и комментариев в ETag входят группа, имя
+    автора и число его постов в боковой колонке. Страница зависит от
+    пользователя (форма, кнопка правки), поэтому в ETag входят его id,
+    CSRF-токен формы, его ещё не записанные комментарии (posts.ingest)
+    и число непрочитанных уведомлений в шапке.
+    """
+    parts = Post.objects.filter(id=post_id).annotate(
+        comments_count=Count('comments'),
+        comments_updated=Max('comments__updated')
+    ).values_list(*POST_ETAG_FIELDS, 'comments_count',
+                  'comments_updated').first()
+    if parts is None:
+        parts = ArchivedPost.objects.filter(id=post_id).values_list(
+            *POST_ETAG_FIELDS
+        ).first()
+    if parts is None:
+        return None
+    parts = (*parts, Post.objects.filter(author_id=parts[1]).count())
+    user = request.user
+    if user.is_authenticated:
+        parts = (*parts, user.pk, get_token(request),
+                 len(ingest.pending(user, post_id)),
+                 notifications.unread_count(user))
+    digest = hashlib.md5('-'.join(
+        str(part.timestamp() if hasattr(part, 'timestamp') else part)
+        for part in parts
+    ).encode()).hexdigest()
+    return f'{post_id}-{digest}'
+
+
+@condition(etag_func=post_etag)
 def post_detail(request: HttpRequest, post_id: int) -> HttpResponse:
-    post = get_object_or_404(Post, id=post_id)
+    post, archived = archive.get_post(post_id)
     form = CommentForm()
-    comments = post.comments.all()
-    context = {'post': post, 'form': form, 'comments': comments}
+    comments = post.comments.select_related('author')
+    if not archived:
+        comments = ingest.with_pending(comments, post, request.user)
+    context = {
+        'post': post,
+        'form': form,
+        'comments': comments,
+        'archived': archived
+    }
     return render(request, 'posts/post_detail.html', context)
 
 
@@ -59,6 +169,10 @@ def post_create(request: HttpRequest) -> HttpResponse:
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if post.image:
+            images.prepare(post.image.name)
+        feeds.post_created(post)
+        notifications.publish(post)
         return redirect('posts:profile', username=post.author.username)
     return render(request, 'posts/create.html', {'form': form})
 
@@ -68,13 +182,20 @@ def post_edit(request: HttpRequest, post_id: int) -> HttpResponse:
     post = get_object_or_404(Post, pk=post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post.pk)
+    old_group_id = post.group_id
+    old_text = post.text
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
         instance=post
     )
     if form.is_valid():
-        post.save()
+        with transaction.atomic():
+            post.save()
+            revisions.record(post, old_text)
+        if post.image and 'image' in form.changed_data:
+            images.prepare(post.image.name)
+        feeds.post_changed(post, old_group_id)
         return redirect('posts:post_detail', post.pk)
     return render(
         request,
@@ -88,20 +209,42 @@ def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
+        try:
+            ingest.submit(form, post, request.user)
+        except ingest.CommentRejected as error:
+            form.add_error(None, str(error))
+            context = {
+                'post': post,
+                'form': form,
+                'comments': post.comments.select_related('author'),
+                'archived': False
+            }
+            return render(request, 'posts/post_detail.html', context,
+                          status=429)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginator(posts, request)
+    page_obj = viewer.attach(
+        paginator(archive.follow_feed(request.user), request), request.user
+    )
     return render(request, 'posts/follow.html', {'page_obj': page_obj})
 
 
+@login_required
+def notification_index(request):
+    page_obj = paginator(
+        request.user.notifications.filter(
+            Q(post__is_hidden=False) | Q(post__isnull=True)
+        ).select_related('post__author', 'archived_post__author'),
+        request
+    )
+    notifications.mark_read(request.user, [n.pk for n in page_obj])
+    return render(request, 'posts/notifications.html',
+                  {'page_obj': page_obj})
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
@@ -109,6 +252,7 @@ def profile_follow(request, username):
         Follow.objects.get_or_create(
             user=request.user, author=author
         )
+        archive.follows_changed(request.user)
     return redirect('posts:profile', username)
 
 
@@ -116,4 +260,5 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
+    archive.follows_changed(request.user)
     return redirect('posts:profile', username)
@@ -0,0 +1,146 @@
+"""Прогрев кэшей после деплоя.
+
+Страницы первых лент рендерятся теми же view, что и под живым трафиком,
+поэтому в кэш попадают ровно те страницы и карточки, которые будут
+запрошены. Миниатюры картинок генерируются заранее, шаблоны
+компилируются до первого запроса.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.db.models import Count
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from core import images
+
+from . import feeds
+from .models import POPULAR, Group, Post
+
+User = get_user_model()
+
+TEMPLATES = (
+    'base.html',
+    'posts/index.html',
+    'posts/popular.html',
+    'posts/group_list.html',
+    'posts/profile.html',
+    'posts/post_detail.html',
+    'posts/follow.html',
+    'includes/post_info.html',
+    'includes/paginator.html',
+    'includes/responsive_image.html',
+)
+
+
+def top_groups(limit):
+    """Горячие группы, дополненные группами с наибольшим числом постов."""
+    hot = feeds.hot_groups()
+    ids = sorted(hot, key=hot.get, reverse=True)[:limit]
+    if len(ids) < limit:
+        ids += list(
+            Group.objects.exclude(pk__in=ids)
+            .annotate(posts_count=Count('posts'))
+            .order_by('-posts_count')
+            .values_list('pk', flat=True)[:limit - len(ids)]
+        )
+    slugs = dict(Group.objects.filter(pk__in=ids).values_list('pk', 'slug'))
+    return [slugs[pk] for pk in ids if pk in slugs]
+
+
+def top_profiles(limit):
+    """Авторы с наибольшим числом постов."""
+    return list(
+        User.objects.annotate(posts_count=Count('posts'))
+        .filter(posts_count__gt=0)
+        .order_by('-posts_count')
+        .values_list('username', flat=True)[:limit]
+    )
+
+
+def feed_urls(pages, groups, profiles):
+    """Адреса первых страниц лент, которые нужно прогреть."""
+    bases = [reverse('posts:index'), reverse('posts:popular')]
+    bases += [
+        reverse('posts:group_list', kwargs={'slug': slug})
+        for slug in top_groups(groups)
+    ]
+    bases += [
+        reverse('posts:profile', kwargs={'username': username})
+        for username in top_profiles(profiles)
+    ]
+    return [f'{base}?page={page}' for base in bases
+            for page in range(1, pages + 1)]
+
+
+def image_names(pages, groups, profiles):
+    """Имена картинок постов с первых страниц лент."""
+    limit = pages * settings.POSTS_ON_PAGE
+    posts = Post.objects.exclude(image='').exclude(image=None)
+    querysets = [posts, posts.filter(POPULAR).order_by('-score', '-id')]
+    querysets += [posts.filter(group__slug=slug)
+                  for slug in top_groups(groups)]
+    querysets += [posts.filter(author__username=username)
+                  for username in top_profiles(profiles)]
+    names = set()
+    for queryset in querysets:
+        names.update(queryset.values_list('image', flat=True)[:limit])
+    return sorted(names)
+
+
+def render_url(url):
+    """Отрендерить страницу анонимным запросом, минуя middleware.
+
+    Запрос помечен warmup, чтобы не накручивать счётчики горячих групп.
+    """
+    request = RequestFactory().get(url)
+    request.user = AnonymousUser()
+    request.warmup = True
+    match = resolve(request.path_info)
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        raise RuntimeError(f'{url}: статус {response.status_code}')
+
+
+def make_thumbnail(name):
+    """Все миниатюры, которые выведет тег responsive_image."""
+    images.build(name)
+
+
+def _run(tasks, workers):
+    """Выполнить задачи и вернуть список ошибок."""
+    def call(task):
+        func, arg = task
+        try:
+            func(arg)
+        except Exception as error:
+            return f'{func.__name__}({arg}): {error}'
+        finally:
+            if workers > 1:
+                connections.close_all()
+
+    if workers <= 1:
+        results = map(call, tasks)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(call, tasks))
+    return [error for error in results if error]
+
+
+def warm_caches(pages, groups, profiles, workers):
+    """Прогреть шаблоны, миниатюры и страницы лент.
+
+    Возвращает число выполненных задач и список ошибок.
+    """
+    tasks = [(get_template, name) for name in TEMPLATES]
+    tasks += [(make_thumbnail, name)
+              for name in image_names(pages, groups, profiles)]
+    errors = _run(tasks, workers)
+    # Страницы рендерятся после миниатюр, чтобы не генерировать их дважды.
+    urls = feed_urls(pages, groups, profiles)
+    errors += _run([(render_url, url) for url in urls], workers)
+    return len(tasks) + len(urls), errors
@@ -0,0 +1,31 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from core.admin import BackgroundDeleteMixin, run_admin_job
+from posts import moderation
+
+User = get_user_model()
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class ModeratedUserAdmin(BackgroundDeleteMixin, UserAdmin):
+    actions = ('delete_content_in_background', 'hide_content_in_background')
+
+    def delete_content_in_background(self, request, queryset):
+        run_admin_job(self, request, 'Удаление постов и комментариев',
+                      moderation.delete_user_content,
+                      list(queryset.values_list('pk', flat=True)))
+    delete_content_in_background.short_description = (
+        'Удалить посты и комментарии в фоне'
+    )
+
+    def hide_content_in_background(self, request, queryset):
+        run_admin_job(self, request, 'Скрытие постов и комментариев',
+                      moderation.hide_user_content,
+                      list(queryset.values_list('pk', flat=True)))
+    hide_content_in_background.short_description = (
+        'Скрыть посты и комментарии в фоне'
+    )
@@ -0,0 +1,103 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+
+from core.ratelimit import TokenBucket
+
+from . import hashing
+
+USER_CACHE_KEY = 'auth_user:{}'
+
+User = get_user_model()
+
+ip_bucket = TokenBucket('login_ip', *settings.LOGIN_THROTTLE_IP)
+username_bucket = TokenBucket(
+    'login_username', *settings.LOGIN_THROTTLE_USERNAME
+)
+
+
+def login_allowed(request, username):
+    """Проверить лимиты попыток входа по IP и по имени пользователя.
+
+    Лимит по имени тратят только неудачные попытки (login_failed):
+    успешные входы владельца не расходуют его.
+    """
+    ip_allowed = ip_bucket.consume(request.META.get('REMOTE_ADDR'))
+    return username_bucket.available(username.lower()) and ip_allowed
+
+
+def login_failed(username):
+    username_bucket.consume(username.lower())
+
+
+@lru_cache(maxsize=None)
+def dummy_password():
+    """Хеш основным хешером для проверок несуществующих пользователей."""
+    return make_password('dummy-password')
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из общего кэша.
+
+    AuthenticationMiddleware вызывает get_user на каждом запросе
+    авторизованного пользователя; кэш снимает этот запрос к БД.
+    Запись сбрасывается сигналами из users.signals. Кэшировать можно,
+    только если кэш общий для всех процессов (SHARED_CACHE), иначе
+    другие воркеры до 15 минут видят старый пароль и флаг is_active.
+
+    При входе попытки сверх лимитов отклоняются до хеширования пароля,
+    а сам хеш проверяется в пуле процессов users.hashing.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        self._throttle(request, username)
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            user = None
+        is_correct = self._check_password(request, user, password)
+        if is_correct and self.user_can_authenticate(user):
+            return user
+        if request is not None:
+            login_failed(username)
+        return None
+
+    def _throttle(self, request, username):
+        """Отклонить попытку сверх лимитов, не хешируя пароль."""
+        if request is not None and not login_allowed(request, username):
+            request.login_throttled = True
+            raise PermissionDenied
+
+    def _check_password(self, request, user, password):
+        try:
+            if user is None:
+                # Проверяем хеш-пустышку, чтобы время ответа не
+                # выдавало, существует ли пользователь.
+                hashing.verify(get_hasher(), password, dummy_password())
+                return False
+            return hashing.check_password(user, password)
+        except hashing.PasswordCheckRejected:
+            if request is not None:
+                request.login_throttled = True
+            raise PermissionDenied
+
+    def get_user(self, user_id):
+        if not settings.SHARED_CACHE:
+            return super().get_user(user_id)
+        key = USER_CACHE_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
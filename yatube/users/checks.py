@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """SHARED_CACHE нельзя включать с кэшем одного процесса."""
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.SHARED_CACHE and backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f'SHARED_CACHE включён, но кэш default ({backend}) '
+            'не общий для процессов.',
+            hint='Подключите Memcached или Redis либо выключите '
+                 'SHARED_CACHE.',
+            id='users.E001',
+        )]
+    return []
@@ -0,0 +1,196 @@
+"""Выгрузка данных пользователя одним ZIP-архивом.
+
+В архиве posts.ndjson и comments.ndjson (включая скрытые и архивные
+записи), follows.csv и картинки постов в images/. Строки читаются
+через iterator(chunk_size=...), а ZIP пишется в буфер без seek и
+отдаётся кусками, поэтому память не зависит от объёма данных.
+Небольшие аккаунты скачивают архив сразу потоком, для аккаунтов
+больше EXPORT_SYNC_ROWS строк архив собирается фоновым заданием
+в EXPORT_ROOT. Задание привязано к пользователю полем owner, поэтому
+его состояние видно любому воркеру. Архивы старше EXPORT_KEEP_DAYS
+удаляет команда clean_exports.
+"""
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from core.jobs import run_job
+from core.models import BackgroundJob
+from posts.models import ArchivedComment, ArchivedPost, Comment, Follow, Post
+
+JOB_NAME = 'Выгрузка данных {}'
+CHUNK = 64 * 1024
+
+
+class _Sink:
+    """Файлоподобный буфер без seek: ZipFile пишет, генератор забирает."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        self.size = 0
+        return data
+
+
+def _rows(queryset, fields):
+    return queryset.values_list(*fields).iterator(
+        chunk_size=settings.EXPORT_CHUNK_SIZE
+    )
+
+
+def _ndjson(fields, querysets):
+    for queryset in querysets:
+        for row in _rows(queryset, fields):
+            yield json.dumps(dict(zip(fields, row)), ensure_ascii=False,
+                             default=str) + '\n'
+
+
+def _csv(fields, queryset):
+    line = io.StringIO()
+    writer = csv.writer(line)
+    writer.writerow(fields)
+    for row in _rows(queryset, fields):
+        writer.writerow(row)
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+    yield line.getvalue()
+
+
+def _posts(user):
+    return (Post.all_objects.filter(author=user).order_by('id'),
+            ArchivedPost.objects.filter(author=user).order_by('id'))
+
+
+def tables(user):
+    """Пары (имя файла, строки) для архива пользователя."""
+    post_fields = ('id', 'created', 'text', 'group__slug', 'image')
+    comment_fields = ('id', 'created', 'post_id', 'text')
+    return (
+        ('posts.ndjson', _ndjson(post_fields, _posts(user))),
+        ('comments.ndjson', _ndjson(comment_fields, (
+            Comment.all_objects.filter(author=user).order_by('id'),
+            ArchivedComment.objects.filter(author=user).order_by('id'),
+        ))),
+        ('follows.csv', _csv(
+            ('author__username', 'author_id'),
+            Follow.objects.filter(user=user).order_by('id')
+        )),
+    )
+
+
+def images(user):
+    for queryset in _posts(user):
+        yield from _rows(queryset.exclude(image=''), ('image',))
+
+
+def row_count(user):
+    return sum(queryset.count() for queryset in (
+        *_posts(user),
+        Comment.all_objects.filter(author=user),
+        ArchivedComment.objects.filter(author=user),
+        Follow.objects.filter(user=user),
+    ))
+
+
+def stream(user, progress=None):
+    """Байты ZIP-архива с данными user, кусками по ~CHUNK.
+
+    progress(1) вызывается после каждой таблицы.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, lines in tables(user):
+            with archive.open(name, 'w') as entry:
+                for line in lines:
+                    entry.write(line.encode())
+                    if sink.size >= CHUNK:
+                        yield sink.take()
+            if progress is not None:
+                progress(1)
+        for (image,) in images(user):
+            if not default_storage.exists(image):
+                continue
+            # Картинки уже сжаты, повторно их не сжимаем.
+            info = zipfile.ZipInfo(f'images/{image}')
+            with default_storage.open(image) as source, \
+                    archive.open(info, 'w') as entry:
+                for data in source.chunks(CHUNK):
+                    entry.write(data)
+                    yield sink.take()
+    yield sink.take()
+
+
+def path(user):
+    return os.path.join(settings.EXPORT_ROOT, f'{user.pk}.zip')
+
+
+def build(job, user):
+    """Фоновое задание: записать архив user в EXPORT_ROOT."""
+    os.makedirs(settings.EXPORT_ROOT, exist_ok=True)
+    target = path(user)
+    partial = f'{target}.{job.pk}.part'
+    with open(partial, 'wb') as out:
+        for data in stream(user, job.advance):
+            out.write(data)
+    os.replace(partial, target)
+
+
+def start(user):
+    """Запустить сборку архива, если она ещё не идёт."""
+    job = current_job(user)
+    if job is not None and job.status in (BackgroundJob.PENDING,
+                                          BackgroundJob.RUNNING):
+        return job
+    if os.path.exists(path(user)):
+        os.remove(path(user))
+    return run_job(JOB_NAME.format(user.username), build, user,
+                   total=len(tables(user)), owner=user)
+
+
+def current_job(user):
+    """Последнее задание выгрузки пользователя."""
+    return BackgroundJob.objects.filter(
+        owner=user, name=JOB_NAME.format(user.username)
+    ).first()
+
+
+def ready(user):
+    job = current_job(user)
+    return (job is not None and job.status == BackgroundJob.DONE
+            and os.path.exists(path(user)))
+
+
+def cleanup(max_age):
+    """Удалить архивы и недописанные файлы старше max_age секунд.
+
+    Возвращает число удалённых файлов.
+    """
+    if not os.path.isdir(settings.EXPORT_ROOT):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    with os.scandir(settings.EXPORT_ROOT) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+    return removed
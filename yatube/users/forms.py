@@ -1,5 +1,6 @@
+from django import forms
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 
 User = get_user_model()
 
@@ -7,3 +8,20 @@ User = get_user_model()
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class LoginForm(AuthenticationForm):
+    error_messages = {
+        **AuthenticationForm.error_messages,
+        'throttled': 'Слишком много попыток входа. Попробуйте позже.',
+    }
+
+    def clean(self):
+        try:
+            return super().clean()
+        except forms.ValidationError:
+            if getattr(self.request, 'login_throttled', False):
+                raise forms.ValidationError(
+                    self.error_messages['throttled'], code='throttled'
+                )
+            raise
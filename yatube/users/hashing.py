@@ -0,0 +1,94 @@
+"""Проверка паролей в ограниченном пуле процессов.
+
+Хеширование пароля занимает процессор на десятки миллисекунд. Во время
+подбора паролей проверки уходят в пул из PASSWORD_CHECK_WORKERS
+процессов, а в очереди ждёт не больше PASSWORD_CHECK_QUEUE проверок:
+остальные отклоняются сразу, не нагружая воркеры веб-сервера.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import (get_hasher, identify_hasher,
+                                         is_password_usable)
+from django.utils.module_loading import import_string
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+class PasswordCheckRejected(Exception):
+    """Очередь проверок переполнена или проверка не уложилась в срок."""
+
+
+def _verify(hasher_path, password, encoded):
+    return import_string(hasher_path)().verify(password, encoded)
+
+
+def _get_pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_CHECK_WORKERS
+            )
+            _slots = threading.BoundedSemaphore(
+                settings.PASSWORD_CHECK_QUEUE
+            )
+    return _executor, _slots
+
+
+def verify(hasher, password, encoded):
+    """Проверить пароль хешером, по возможности в пуле процессов."""
+    # Демоническим процессам (воркерам test --parallel) нельзя
+    # заводить дочерние, там проверяем на месте.
+    if (not settings.PASSWORD_CHECK_WORKERS
+            or multiprocessing.current_process().daemon):
+        return hasher.verify(password, encoded)
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise PasswordCheckRejected
+    cls = type(hasher)
+    try:
+        future = executor.submit(
+            _verify, f'{cls.__module__}.{cls.__qualname__}',
+            password, encoded
+        )
+    except Exception:
+        slots.release()
+        raise
+    # Место в очереди освобождается, когда проверка действительно
+    # закончилась, а не когда запрос перестал её ждать.
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=settings.PASSWORD_CHECK_TIMEOUT)
+    except FutureTimeoutError:
+        raise PasswordCheckRejected
+
+
+def check_password(user, password):
+    """Аналог User.check_password, проверяющий хеш в пуле процессов.
+
+    Пароль, сохранённый не основным хешером из PASSWORD_HASHERS или
+    с устаревшими параметрами, после успешного входа перехешируется.
+    """
+    encoded = user.password
+    if password is None or not is_password_usable(encoded):
+        return False
+    preferred = get_hasher()
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    hasher_changed = hasher.algorithm != preferred.algorithm
+    must_update = hasher_changed or preferred.must_update(encoded)
+    is_correct = verify(hasher, password, encoded)
+    if not is_correct and not hasher_changed and must_update:
+        hasher.harden_runtime(password, encoded)
+    if is_correct and must_update:
+        user.set_password(password)
+        user.save(update_fields=['password'])
+    return is_correct
@@ -0,0 +1,19 @@
+from django.conf import settings
+
+from core.management.base import CronCommand
+from users.export import cleanup
+
+
+class Command(CronCommand):
+    help = ('Удалить архивы выгрузки данных старше EXPORT_KEEP_DAYS дней. '
+            'Запускать по расписанию раз в сутки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=float, default=settings.EXPORT_KEEP_DAYS,
+            help='Удалять архивы старше стольких дней'
+        )
+
+    def handle(self, *args, **options):
+        removed = cleanup(options['days'] * 24 * 3600)
+        self.stdout.write(f'Удалено архивов: {removed}')
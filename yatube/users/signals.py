@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import USER_CACHE_KEY
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    """Сбросить закэшированного пользователя при изменении."""
+    cache.delete(USER_CACHE_KEY.format(instance.pk))
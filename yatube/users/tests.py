@@ -0,0 +1,204 @@
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from http import HTTPStatus
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post
+
+from . import export
+from .backends import USER_CACHE_KEY
+from .checks import check_shared_cache
+
+User = get_user_model()
+
+CACHED_DB_SESSIONS = 'django.contrib.sessions.backends.cached_db'
+
+
+@override_settings(SHARED_CACHE=True, SESSION_ENGINE=CACHED_DB_SESSIONS)
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeName')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_authenticated_request_without_queries(self):
+        """Сессия и пользователь берутся из кэша без запросов к БД"""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_cached_user_reset_on_save(self):
+        """Сохранение пользователя сбрасывает кэш"""
+        self.authorized_client.get(reverse('about:author'))
+        self.assertIsNotNone(cache.get(USER_CACHE_KEY.format(self.user.pk)))
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(self.user.pk)))
+        response = self.authorized_client.get(reverse('about:author'))
+        self.assertEqual(response.context['user'].first_name, 'Новое имя')
+
+    @override_settings(SHARED_CACHE=False)
+    def test_process_cache_not_used(self):
+        """С кэшем процесса пользователь читается из БД"""
+        self.authorized_client.get(reverse('about:author'))
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(self.user.pk)))
+
+    def test_shared_cache_required(self):
+        """SHARED_CACHE с LocMemCache не проходит проверку"""
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)], ['users.E001']
+        )
+
+
+class LoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeName')
+        cls.user.password = make_password(
+            'secret-password', hasher='pbkdf2_sha256'
+        )
+        cls.user.save()
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def login(self, password):
+        return self.client.post(
+            reverse('users:login'),
+            {'username': 'SomeName', 'password': password}
+        )
+
+    def test_login_rehashes_password(self):
+        """Вход перехеширует пароль основным хешером"""
+        response = self.login('secret-password')
+        self.assertRedirects(response, reverse('posts:index'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('argon2'))
+
+    def test_login_throttled(self):
+        """Попытки сверх лимита отклоняются даже с верным паролем"""
+        capacity = settings.LOGIN_THROTTLE_USERNAME[0]
+        for _ in range(capacity):
+            self.login('wrong-password')
+        response = self.login('secret-password')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Слишком много попыток входа')
+
+    def test_successful_logins_not_throttled(self):
+        """Успешные входы не тратят лимит по имени пользователя"""
+        capacity = settings.LOGIN_THROTTLE_USERNAME[0]
+        for _ in range(capacity + 1):
+            response = self.login('secret-password')
+            self.assertRedirects(response, reverse('posts:index'))
+            self.client.logout()
+
+    def test_unknown_user_throttled(self):
+        """Попытки входа под несуществующим именем тоже ограничены"""
+        capacity = settings.LOGIN_THROTTLE_USERNAME[0]
+        for _ in range(capacity + 1):
+            response = self.client.post(
+                reverse('users:login'),
+                {'username': 'Nobody', 'password': 'wrong-password'}
+            )
+        self.assertContains(response, 'Слишком много попыток входа')
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='SomeName')
+        cls.author = User.objects.create_user(username='Author')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        media = override_settings(
+            MEDIA_ROOT=root, EXPORT_ROOT=f'{root}/exports',
+            BACKGROUND_JOBS_SYNC=True
+        )
+        media.enable()
+        self.addCleanup(media.disable)
+        self.post = Post.objects.create(
+            text='Пост с картинкой', author=self.user,
+            image=SimpleUploadedFile('small.gif', b'GIF89a', 'image/gif')
+        )
+        Comment.objects.create(text='Комментарий', author=self.user,
+                               post=self.post)
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def check_archive(self, data):
+        archive = zipfile.ZipFile(io.BytesIO(data))
+        self.assertEqual(
+            set(archive.namelist()),
+            {'posts.ndjson', 'comments.ndjson', 'follows.csv',
+             f'images/{self.post.image.name}'}
+        )
+        posts = [json.loads(line) for line in
+                 archive.read('posts.ndjson').decode().splitlines()]
+        self.assertEqual(posts[0]['text'], 'Пост с картинкой')
+        self.assertIn('Комментарий', archive.read('comments.ndjson').decode())
+        self.assertEqual(archive.read('follows.csv').decode().splitlines(),
+                         ['author__username,author_id',
+                          f'Author,{self.author.pk}'])
+        self.assertEqual(
+            archive.read(f'images/{self.post.image.name}'), b'GIF89a'
+        )
+
+    def test_streamed_export(self):
+        """Небольшой аккаунт получает архив сразу потоком"""
+        response = self.client.post(reverse('users:export_start'))
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.check_archive(b''.join(response.streaming_content))
+
+    @override_settings(EXPORT_SYNC_ROWS=1)
+    def test_background_export(self):
+        """Большой аккаунт собирается фоновым заданием"""
+        response = self.client.post(reverse('users:export_start'))
+        self.assertRedirects(response, reverse('users:export'))
+        # Задание находится по владельцу, а не через кэш процесса.
+        cache.clear()
+        response = self.client.get(reverse('users:export'))
+        self.assertTrue(response.context['ready'])
+        response = self.client.get(reverse('users:export_download'))
+        self.check_archive(b''.join(response.streaming_content))
+
+    @override_settings(EXPORT_SYNC_ROWS=1)
+    def test_clean_exports(self):
+        """Старые архивы удаляются командой clean_exports"""
+        self.client.post(reverse('users:export_start'))
+        call_command('clean_exports', stdout=StringIO())
+        self.assertTrue(export.ready(self.user))
+        call_command('clean_exports', days=0, stdout=StringIO())
+        self.assertFalse(export.ready(self.user))
+
+    def test_download_not_ready(self):
+        """Без собранного архива скачивание отдаёт 404"""
+        response = self.client.get(reverse('users:export_download'))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -2,6 +2,7 @@ from django.contrib.auth.views import LoginView, LogoutView
 from django.urls import path
 
 from . import views
+from .forms import LoginForm
 
 app_name = 'users'
 
@@ -12,9 +13,15 @@ urlpatterns = [
         name='logout'
     ),
     path('signup/', views.SignUp.as_view(), name='signup'),
+    path('export/', views.export_data, name='export'),
+    path('export/start/', views.export_start, name='export_start'),
+    path('export/download/', views.export_download, name='export_download'),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        LoginView.as_view(
+            template_name='users/login.html',
+            authentication_form=LoginForm
+        ),
         name='login'
     ),
 ]
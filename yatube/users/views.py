@@ -1,10 +1,56 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
+from django.views.decorators.http import require_POST
 from django.views.generic import CreateView
 
+from . import export
 from .forms import CreationForm
 
+EXPORT_NAME = 'yatube-{}.zip'
+
 
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('users:login')
     template_name = 'users/signup.html'
+
+
+@login_required
+def export_data(request):
+    """Страница выгрузки данных и состояние фоновой сборки"""
+    context = {
+        'job': export.current_job(request.user),
+        'ready': export.ready(request.user),
+    }
+    return render(request, 'users/export.html', context)
+
+
+@login_required
+@require_POST
+def export_start(request):
+    """Отдать архив потоком или запустить его сборку в фоне"""
+    user = request.user
+    if export.row_count(user) > settings.EXPORT_SYNC_ROWS:
+        export.start(user)
+        return redirect('users:export')
+    response = StreamingHttpResponse(
+        export.stream(user), content_type='application/zip'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{EXPORT_NAME.format(user.username)}"'
+    )
+    return response
+
+
+@login_required
+def export_download(request):
+    """Скачать архив, собранный фоновым заданием"""
+    if not export.ready(request.user):
+        raise Http404('Архив ещё не готов')
+    return FileResponse(
+        open(export.path(request.user), 'rb'), as_attachment=True,
+        filename=EXPORT_NAME.format(request.user.username)
+    )
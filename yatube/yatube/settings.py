@@ -1,4 +1,5 @@
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -14,7 +15,9 @@ ALLOWED_HOSTS = [
 ]
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Без автопоиска admin.py при старте: админка импортируется
+    # в yatube.urls при первом разборе URL.
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -25,20 +28,36 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# Команда manage.py, django-admin или python -m django текущего
+# процесса; None для WSGI и pytest.
+_PROGRAM = os.path.basename(sys.argv[0]) if sys.argv else ''
+if _PROGRAM == '__main__.py':
+    _PROGRAM = os.path.basename(os.path.dirname(sys.argv[0]))
+MANAGEMENT_COMMAND = (
+    sys.argv[1] if _PROGRAM in (
+        'manage.py', 'django-admin', 'django-admin.py', 'django'
+    ) and len(sys.argv) > 1 else None
+)
+# Debug toolbar нужен только отладочному серверу: остальным командам
+# его импорт и проверки лишь замедляют запуск.
+DEBUG_TOOLBAR = DEBUG and MANAGEMENT_COMMAND in (None, 'runserver')
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
@@ -54,6 +73,8 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.notifications.'
+                'unread_notifications',
             ],
         },
     },
@@ -68,6 +89,30 @@ DATABASES = {
     }
 }
 
+# Тестовые базы SQLite берутся из снимков, собранных один раз на
+# набор миграций (core.testdb).
+TEST_RUNNER = 'core.test_runner.SnapshotTestRunner'
+TEST_DB_SNAPSHOTS = True
+TEST_DB_SNAPSHOT_DIR = os.path.join(BASE_DIR, '.test_db')
+
+# Первый хешер основной: пароли, сохранённые остальными, перехешируются
+# при входе (users.hashing.check_password).
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Проверка паролей в пуле процессов; 0 — проверять в текущем процессе.
+PASSWORD_CHECK_WORKERS = 2
+PASSWORD_CHECK_QUEUE = 16
+PASSWORD_CHECK_TIMEOUT = 5
+
+# Лимиты попыток входа: (число попыток, за сколько секунд восполняются).
+LOGIN_THROTTLE_IP = (20, 60)
+LOGIN_THROTTLE_USERNAME = (5, 300)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -95,9 +140,23 @@ USE_TZ = True
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# Вне DEBUG статика собирается с отпечатками в именах и сжатыми копиями.
+if not DEBUG:
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Раздавать STATIC_ROOT из процесса (core.static), если нет CDN или nginx.
+SERVE_STATIC = False
+STATIC_MAX_AGE = 60 * 60
+
+# Сжатие ответов (core.middleware): ответы короче порога не сжимаются.
+COMPRESSION_MIN_SIZE = 512
+HTML_MINIFY = True
 
 POSTS_ON_PAGE = 10
 
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = 60 * 15
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
@@ -113,9 +172,88 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    # Лимиты частоты (core.ratelimit) должны быть общими для процессов.
+    # Таблица создаётся командой createcachetable; с общим кэшем сюда
+    # можно подставить его настройки.
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'ratelimit_cache',
+    },
 }
+# Кэш default общий для всех процессов (Memcached, Redis). Только тогда
+# сессии и пользователь сессии читаются из кэша: сброс записи при выходе
+# или изменении пользователя должен быть виден всем воркерам. С кэшем
+# процесса (LocMemCache) проверка users.E001 не даст включить флаг.
+SHARED_CACHE = False
+if SHARED_CACHE:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Таблицы больше порога считаются в админке по статистике БД.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Фоновые задания (core.jobs) и массовая модерация (posts.moderation)
+BACKGROUND_JOB_WORKERS = 2
+BACKGROUND_JOBS_SYNC = False
+MODERATION_BATCH_SIZE = 500
+# Скрытые объекты удаляются физически через столько дней (purge_hidden).
+HIDDEN_PURGE_AFTER_DAYS = 30
+
+# Посты старше этого срока команда archive_posts переносит в архив.
+POSTS_ARCHIVE_AFTER_DAYS = 365
+
+# Лента «Популярное» (posts.ranking)
+POPULAR_COMMENT_WEIGHT = 1.0
+POPULAR_FOLLOWER_WEIGHT = 1.0
+POPULAR_HALF_LIFE_HOURS = 24
+POPULAR_DECAY_INTERVAL_HOURS = 1
+POPULAR_MIN_SCORE = 0.01
+
+# Приём комментариев (posts.ingest): лимит (число, за сколько секунд),
+# окно подавления повторов и буфер отложенной записи. При размере
+# буфера 1 комментарии пишутся сразу; буфер больше 1 держит комментарии
+# в памяти процесса, и при падении воркера они теряются.
+COMMENT_THROTTLE = (10, 60)
+COMMENT_DUPLICATE_WINDOW = 60 * 10
+COMMENT_BUFFER_SIZE = 1
+COMMENT_BUFFER_SECONDS = 2
+COMMENT_BUFFER_RETRIES = 3
+
+# Уведомления подписчиков (posts.notifications)
+NOTIFICATION_BATCH_SIZE = 500
+NOTIFICATION_COUNT_TIMEOUT = 60 * 5
+# Адрес сайта для ссылок в письмах.
+SITE_URL = 'http://127.0.0.1:8000'
 
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+# Материализованные ленты горячих групп (posts.feeds)
+GROUP_FEED_PAGES = 3
+GROUP_FEED_HOT_HITS = 50
+GROUP_FEED_HOT_WINDOW = 60
+GROUP_FEED_TIMEOUT = 60 * 10
+# Карточка поста кэшируется по id и дате изменения поста.
+POST_CARD_TIMEOUT = 60 * 60
+# Потоковые страницы со всеми постами: размер пачки чтения и рендеринга.
+EXPORT_CHUNK_SIZE = 100
+# Выгрузка данных пользователя (users.export): аккаунты больше порога
+# собираются фоновым заданием в EXPORT_ROOT, вне MEDIA_ROOT, и хранятся
+# EXPORT_KEEP_DAYS дней (команда clean_exports).
+EXPORT_SYNC_ROWS = 5000
+EXPORT_ROOT = os.path.join(BASE_DIR, 'exports')
+EXPORT_KEEP_DAYS = 7
+# Ширины миниатюр картинок постов для srcset (core.images).
+POST_IMAGE_WIDTHS = (480, 960, 1440)
+POST_IMAGE_DEFAULT_WIDTH = 960
+POST_IMAGE_SIZES = '(min-width: 1200px) 1110px, 100vw'
+
+# Прогрев кэшей после деплоя (manage.py warm_caches)
+WARM_CACHES_PAGES = 2
+WARM_CACHES_GROUPS = 10
+WARM_CACHES_PROFILES = 10
+WARM_CACHES_WORKERS = 4
+# Прогревать кэши процесса при старте WSGI-приложения: локальный кэш
+# (LocMemCache) живёт внутри процесса, и отдельная команда его не заполнит.
+WARM_CACHES_ON_STARTUP = False
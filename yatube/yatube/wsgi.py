@@ -7,10 +7,31 @@ For more information on this file, see
 https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
+from django.conf import settings
+from django.core.management import CommandError, call_command
 from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
+logger = logging.getLogger(__name__)
+
 application = get_wsgi_application()
+
+if settings.SERVE_STATIC:
+    from core.static import StaticFiles
+
+    application = StaticFiles(
+        application, settings.STATIC_ROOT, settings.STATIC_URL,
+        max_age=settings.STATIC_MAX_AGE
+    )
+
+if settings.WARM_CACHES_ON_STARTUP:
+    # Неудачный прогрев не должен мешать воркеру запуститься.
+    try:
+        call_command('warm_caches')
+    except (CommandError, DatabaseError):
+        logger.exception('Прогрев кэшей при запуске не удался')